@@ -1,311 +1,35 @@
 import math
 import random
 import re
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from copy import deepcopy
 from typing import Callable
-import numpy
-from Graph import Graph, Vertex, Piece
-from Interface import Interface
-from constants import BOT_NAME
-from mcts import MCTS, MCTS_node
+from Graph import Piece
+# minimax moved to engine.py and is only imported here so Game.minimax keeps working
+from engine import Player, Board, State, SearchTimeout, minimax, search_move  # noqa: F401
+from history import History
+from ordering import MoveOrderer
+from transposition import TranspositionTable
+from constants import BOT_NAME, HISTORY_LENGTH
+from mcts import MCTS, remaining_iterations
+from results import append_result
+from rollout import Rollout
+from tablebase import Tablebase
 from utils import parse_int_input
 
 
-class Player:
-    """Class representing a game's player, storing its name and piece.
-    """
-
-    def __init__(self, index: int, piece: Piece, name: str = ""):
-        """Initialize a new player.
-
-        Args:
-            index (int): The index (order) of the player. Only used to generate a default name.
-            piece (Piece): The piece that the player controls.
-            name (str, optional): The name of the player.
-        """
-        self.index = index
-        self.piece = piece
-        if name == "":
-            self.name = f"Player-{index}"
-        else:
-            self.name = name
-
-    def __repr__(self):
-        return self.name
-
-
-class Board(Graph):
-    """Class representing a game's board, which is essentially an extension of a graph.
-
-    Args:
-        Graph (Graph): The graph class being extended.
-    """
-
-    def __init__(self, outer_length: int = 5):
-        """Initialize an empty board with the given outer layer length.
-        Its size will equal the layer's length times 4.
-
-        Args:
-            outer_length (int, optional): The length of the outer layer. Defaults to 5.
-        """
-        super().__init__(outer_length * 4)
-
-        # Connect every vertex of index i with every vertex of index i+i, except for the last vertex
-        for i in range(outer_length * 4 - 1):
-            v1 = self.get_vertex(i)
-            v2 = self.get_vertex((i + 1))
-            self.add_edge(v1, v2)
-
-            # Connect vertices of the outer layer with the vertices directly below them.
-            if i in range(outer_length - 1):
-                v3 = self.get_vertex(outer_length + 2 + i * 2)
-                self.add_edge(v1, v3)
-
-            # Connect vertices of the inner layer with the vertices directly above them.
-            elif i in range(outer_length + 1, outer_length * 3 - 1, 2):
-                v3 = self.get_vertex(outer_length * 3 + 1 +
-                                     (i - outer_length - 1) // 2)
-                self.add_edge(v1, v3)
-
-        # Create loops inside the different layers
-        self.add_edge(self.get_vertex(outer_length - 1), self.get_vertex(0))
-        self.add_edge(
-            self.get_vertex(outer_length * 3 - 1),
-            self.get_vertex(outer_length))
-        self.add_edge(self.get_vertex(outer_length * 4 - 1),
-                      self.get_vertex(outer_length * 3))
-
-        self.outer_length = outer_length
-        self.forks = self.vertex_list
-        self.paths = self.adj_list
-
-    def get_fork(self, index: int) -> Vertex:
-        """Get the fork corresponding to the given index.
-
-        Args:
-            index (int): The fork's index.
-
-        Returns:
-            Vertex: A fork from the board, which is an instance of the Vertex class.
-        """
-        return super().get_vertex(index)
-
-    def __repr__(self):
-        return super().__repr__()
-
-
-class State:
-    """Class representing a game state, which stores the board, the moving player and the winner (if one exists after the move)
-    """
-
-    def __init__(self, player: Player, board: Board = Board(5)):
-        """Initialize a new state with the given player and board.
-
-        Args:
-            player (Player): The player to execute a move.
-            board (Board, optional): The current board.
-            Defaults to a new Board instance of outer length 5 (if it is an initial state).
-        """
-        self.board = board
-        self.player_piece = player.piece
-        self.winner = None
-
-    def get_player_piece_list(self, player_piece: Piece) -> list:
-        """Get the list of pieces from the state's player, given its piece type.
-
-        Args:
-            player_piece (Piece): The piece controller by the state's player.
-
-        Returns:
-            list: The list of indices of the state player's pieces.
-        """
-        return [i for i in self.board.forks if self.board.get_fork(i).status == player_piece]
-
-    def get_opponent_piece(self) -> Piece:
-        """Get the opposite of the state player's piece, which represents the opponent's piece in a game.
-
-        Returns:
-            Piece: The piece with a value opposite to the player.
-        """
-        # 3 - 1 = 2 and 3 - 2 = 1, 1 and 2 are the values for the Red and Black pieces
-        return Piece(3 - self.player_piece.value)
-
-    def update_winner(self):
-        """Update the winner in case a piece has no moves left.
-        """
-        paths = self.board.paths
-        for fork in paths:
-            if Piece.Empty not in [
-                    f.status for f in paths[fork]] and fork.status != Piece.Empty:
-                self.winner = Piece(3 - fork.status.value)
-                return
-
-    def simulate_winner(self) -> Piece | None:
-        """Check and return a winner if it exists, without updating the state.
-
-        Returns:
-            Piece: The winning piece type.
-        """
-        paths = self.board.paths
-        for fork in paths:
-            if Piece.Empty not in [
-                    f.status for f in paths[fork]] and fork.status != Piece.Empty:
-                return Piece(3 - fork.status.value)
-
-    def move(self, curr_index: int, move_index: int, state_history: list):
-        """Execute a move, given the indices of the moving piece and the
-        target fork, as well as the state's history.
-
-        Args:
-            curr_index (int): The index of the piece to be moved.
-            move_index (int): The index of the fork to place the piece.
-            state_history (list): The game's state history.
-
-        Raises:
-            ValueError: The move is invalid.
-        """
-        if self.valid_move(
-                curr_index, move_index, self.player_piece, state_history):
-            self.board.get_fork(move_index).set_status(self.player_piece)
-            self.board.get_fork(curr_index).set_status(Piece.Empty)
-            self.player_piece = Piece(
-                3 - self.player_piece.value)  # Swap turns
-        else:
-            raise ValueError("Invalid move!")
-
-    def valid_move(
-            self, curr_index: int, move_index: int, player_piece: Piece,
-            state_history: list) -> bool:
-        """Check if a move is valid or not.
-
-        Args:
-            curr_index (int): The index of the piece to be moved.
-            move_index (int): The index of the fork to place the piece.
-            player_piece (Piece): The state player's piece.
-            state_history (list): The game's state history.
-
-        Returns:
-            bool: True if the move is valid, False otherwise.
-        """
-        curr_fork = self.board.get_fork(curr_index)
-        move_fork = self.board.get_fork(move_index)
-
-        """
-        A move is valid if:
-            - curr_fork points to a non-empty fork (a piece)
-            - The piece belongs to the state player
-            - The target fork is in the piece's neighbourhood
-            - The target fork is empty
-            - It does not restart a previously closed movement loop, up to a certain length
-            More info on stalemates present on the game's rulebook.
-        """
-        if (move_fork in self.board.paths[curr_fork]
-                and curr_fork.status == player_piece
-                and move_fork.status == Piece.Empty):
-            state_copy = deepcopy(self)
-            state_copy.board.get_fork(move_index).set_status(
-                state_copy.player_piece)
-            state_copy.board.get_fork(curr_index).set_status(Piece.Empty)
-
-            state_list = state_history[:-1]
-            state_list.reverse()
-
-            try:
-                idx = state_list.index(self)
-                return state_list.index(state_copy) != idx - 1
-            except ValueError:
-                return True
-        else:
-            return False
-
-    def available_moves(
-            self, player_piece: Piece, state_history: list) -> list:
-        """Get the available moves a given player can execute.
-
-        Args:
-            player_piece (Piece): The player's piece type.
-            state_history (list): The game's state history.
-
-        Returns:
-            list: List of moves, composed of tuples in the format (chosen_piece_idx, target_fork_idx).
-        """
-        moves = []
-        for i in self.get_player_piece_list(player_piece):
-            for j in self.board.get_siblings(i):
-                if self.valid_move(
-                        i, j.index,
-                        player_piece, state_history):
-                    moves.append((i, j.index))
-        return moves
-
-    def count_moves(self, player_piece: Piece, state_history: list) -> int:
-        """Count the number of moves available to a given player.
-
-        Args:
-            player_piece (Piece): The player's piece type.
-            state_history (list): The game's state history.
-
-        Returns:
-            int: The number of available moves.
-        """
-        return len(self.available_moves(player_piece, state_history))
-
-    def count_middle_pieces(self, player_piece: Piece) -> int:
-        """Count the amount of pieces from a given player in the middle layer of the board.
-
-        Args:
-            player_piece (Piece): The player's piece type.
-
-        Returns:
-            int: The number of pieces in the middle layer.
-        """
-        return sum(
-            self.get_player_piece_list(player_piece).count(i)
-            for i in range(
-                self.board.outer_length, self.board.outer_length * 4))
-
-    def list_moves(self, player_piece: Piece) -> list:
-        """List the number of moves available for each piece, given a player.
-
-        Args:
-            player_piece (Piece): The player's piece type.
-
-        Returns:
-            list: A list of the number of possible moves for each player piece.
-        """
-        player_path_status = [
-            list(map(lambda fork: fork.status, v)) for k,
-            v in self.board.paths.items() if k.status == player_piece]
-        return [path.count(Piece.Empty) for path in player_path_status]
-
-    def is_final(self) -> bool:
-        """Check if a state is final or not.
-
-        Returns:
-            bool: True if the state is final, False otherwise.
-        """
-        paths = self.board.paths
-        for fork in paths:
-            if Piece.Empty not in [
-                    f.status for f in paths[fork]] and fork.status != Piece.Empty:
-                return True
-        return False
-
-    # Two states are considered equal if the board is the same.
-    def __eq__(self, state):
-        return self.board == state.board
-
-    def __repr__(self):
-        return self.board.__repr__()
-
-
 class Bound:
     """Class representing a game instance.
     """
 
     def __init__(
             self, player_1: Player, player_2: Player, outer_length: int = 5,
-            free_space: int = 0):
+            free_space: int = 0, table_size: int = 1 << 16,
+            move_time: float = None, move_ordering: bool = True,
+            workers: int = 1, headless: bool = False,
+            mcts_nodes: int = 1 << 16, mcts_parallelism: str = "root",
+            tablebase: str = None, reuse_scores: bool = None):
         """Initialize a new Bound game between two given players, given a board's outer length 
         and the free space on the outer/inner layer chosen by one of the players.
 
@@ -314,14 +38,74 @@ class Bound:
             player_2 (Player): The second player.
             outer_length (int): The length of the outer layer.
             free_space (int): The free space on the outer/inner layer.
+            table_size (int, optional): The maximum number of entries in each player's
+            transposition table. Defaults to 65536.
+            move_time (float, optional): The time limit for each minimax or MCTS move, in seconds.
+            Minimax bots then deepen their search up to their depth while within the limit,
+            and MCTS bots run iterations until it runs out.
+            Defaults to None (minimax bots always search to their depth, MCTS bots run their iterations).
+            move_ordering (bool, optional): If minimax sorts moves using killer moves and history
+            heuristics (True) or searches them as generated (False). Defaults to True.
+            workers (int, optional): The number of processes minimax searches the root moves with.
+            The moves chosen are the same as a single process's only if reuse_scores is False.
+            Defaults to 1 (the search runs in this process).
+            headless (bool, optional): If the game runs without a graphical interface, prompts
+            or move logs (True) or not (False). Defaults to False.
+            mcts_nodes (int, optional): The maximum number of nodes in each player's MCTS tree,
+            after which its least visited subtrees are recycled. Defaults to 65536.
+            mcts_parallelism (str, optional): How MCTS uses the worker processes when there is more than one:
+            "root" grows an independent tree in each worker and merges the root moves' visits,
+            "leaf" grows a single tree and runs the rollouts of batches of leaves in the workers.
+            Defaults to "root".
+            tablebase (str, optional): The path of a tablebase file (see tablebase.py). Minimax and MCTS bots
+            play its best move in the won and lost positions it covers. Defaults to None (no tablebase).
+            reuse_scores (bool, optional): If minimax reuses the transposition table scores of earlier moves
+            and deeper searches (True), or only the ones of the same search and depth (False), which keeps
+            each move independent of what the table holds, so serial and parallel searches choose the same moves.
+            Defaults to None (scores are reused unless the root moves are searched in parallel).
+
+        Raises:
+            ValueError: The MCTS parallelism mode is unknown.
         """
-        self.state_history = []
+        if mcts_parallelism not in ("root", "leaf"):
+            raise ValueError(f"Unknown MCTS parallelism: {mcts_parallelism}")
+        self.state_history = History(max_length=HISTORY_LENGTH)
+        # Time taken by each move of the current game, in seconds
+        self.move_times = []
         self.player_1 = player_1
         self.player_2 = player_2
         self.outer_length = outer_length
+        self.move_time = move_time
+        self.table_size = table_size
+        self.move_ordering = move_ordering
+        self.workers = workers
+        self.search_pool = None
+        if reuse_scores is None:
+            reuse_scores = workers == 1
+        # Kept for the whole game, so each minimax search reuses the results of the previous ones
+        # (or only their best moves, to order moves, if scores are not reused)
+        self.transposition_tables = {
+            Piece.Red: TranspositionTable(table_size, reuse_scores),
+            Piece.Black: TranspositionTable(table_size, reuse_scores)}
+        # Also count the nodes visited by each player's searches
+        self.move_orderers = {
+            Piece.Red: MoveOrderer(move_ordering),
+            Piece.Black: MoveOrderer(move_ordering)}
+        # Each player's MCTS tree, moved down to the current position on their next turn
+        self.mcts_trees = {Piece.Red: None, Piece.Black: None}
+        self.mcts_nodes = mcts_nodes
+        self.mcts_parallelism = mcts_parallelism
+        self.tablebase = None
+        if tablebase is not None:
+            self.tablebase = Tablebase(tablebase)
 
         self.state = State(self.player_1, Board(outer_length))
-        self.ui = Interface()
+        self.headless = headless
+        self.ui = None
+        if not headless:
+            # Only games with an interface load pygame
+            from Interface import Interface
+            self.ui = Interface()
         self.initial_board = self.state.board
         self.place_pieces(free_space)
 
@@ -414,8 +198,9 @@ class Bound:
         Returns:
             Player: The player that won the game, after it is played.
         """
-        state_copy = deepcopy(self.state)
-        self.state_history = [state_copy]
+        self.state_history = History(
+            [self.state.get_hash()], max_length=HISTORY_LENGTH)
+        self.move_times = []
 
         match mode:
             case 1:
@@ -435,16 +220,12 @@ class Bound:
                 winner = self.game_loop(
                     bot_1, bot_2, depth_1, depth_2)
 
-        if self.player_1.piece == winner:
-            input(
-                f"Winner: {self.player_1.name} ({self.player_1.piece.name})")
+        self.close_search_pool()
+        winner = self.player_1 if self.player_1.piece == winner else self.player_2
+        if not self.headless:
+            input(f"Winner: {winner.name} ({winner.piece.name})")
             self.ui.quit()
-            return self.player_1
-        else:
-            input(
-                f"Winner: {self.player_2.name} ({self.player_2.piece.name})")
-            self.ui.quit()
-            return self.player_2
+        return winner
 
     def game_loop(
             self, player_func: Callable, next_player_func: Callable,
@@ -461,28 +242,70 @@ class Bound:
         Returns:
             Piece: The piece type that won the game.
         """
-        self.ui.ui_init()
-        self.ui.render(self.state.board)
+        if self.ui:
+            self.ui.ui_init()
+            self.ui.render(self.state.board)
         eval_func, next_eval_func = self.evaluate_state_4, self.evaluate_state_4
-        while not self.state_history[-1].winner:
+        while not self.state.winner:
+            if not self.state.has_legal_move(
+                    self.state.player_piece, self.state_history):
+                # A player whose only moves restart closed loops loses, as in MCTS rollouts
+                self.state.winner = self.state.get_opponent_piece()
+                break
             valid = False
+            start = time.perf_counter()
             match player_func.__name__:
                 case "execute_minimax_move":
-                    player_func(eval_func, player_depth)
+                    player_func(eval_func, player_depth, self.move_time)
                     eval_func, next_eval_func = next_eval_func, eval_func
+                case "execute_mcts":
+                    player_func(time_limit=self.move_time)
                 case "ask_move":
                     while not valid:
                         valid = player_func()
                 case _:
                     player_func()
+            self.move_times.append(time.perf_counter() - start)
             player_func, next_player_func = next_player_func, player_func
             player_depth, next_player_depth = next_player_depth, player_depth
-            self.ui.render(self.state.board)
-            if len(self.state_history) > 20:
-                self.state_history = self.state_history[1:]
+            if self.ui:
+                self.ui.render(self.state.board)
+            self.state_history.trim()
 
         return self.state.winner
 
+    def get_record(self, bot_1: int, bot_2: int, seed: str = None) -> dict:
+        """Get the record of the last game played, to be stored in a results log (see results.py).
+
+        Args:
+            bot_1 (int): The starting bot's difficulty.
+            bot_2 (int): The second bot's difficulty.
+            seed (str, optional): The seed the game was played with. Defaults to None.
+
+        Returns:
+            dict: The bots, the starting piece type, the board's outer length, the seed, the winning piece type,
+            the number of moves played and the time taken by each move, in seconds.
+        """
+        return {
+            "bot_1": bot_1,
+            "bot_2": bot_2,
+            "first": self.player_1.piece.name,
+            "outer_length": self.outer_length,
+            "seed": seed,
+            "winner": self.state.winner.name,
+            "plies": len(self.move_times),
+            "move_times": [round(move_time, 6) for move_time in self.move_times],
+        }
+
+    def report(self, message: str):
+        """Print a message about the game's progress, unless the game is headless.
+
+        Args:
+            message (str): The message to print.
+        """
+        if not self.headless:
+            print(message)
+
     def ask_move(self) -> bool:
         """Ask a human player for a move and execute it (if it is valid).
 
@@ -497,8 +320,7 @@ class Bound:
         try:
             self.state.move(piece, move, self.state_history)
             self.state.update_winner()
-            state_copy = deepcopy(self.state)
-            self.state_history.append(state_copy)
+            self.state_history.append(self.state.get_hash())
             return True
         except ValueError:
             print("Invalid move. Try again!")
@@ -511,11 +333,10 @@ class Bound:
             self.state.player_piece,
             self.state_history)
         piece, move = moves[random.randint(0, len(moves) - 1)]
-        print(f"Move ({self.state.player_piece.name}): {(piece, move)}")
+        self.report(f"Move ({self.state.player_piece.name}): {(piece, move)}")
         self.state.move(piece, move, self.state_history)
         self.state.update_winner()
-        state_copy = deepcopy(self.state)
-        self.state_history.append(state_copy)
+        self.state_history.append(self.state.get_hash())
         return True
 
     # evaluate_state_n -> Board evaluation functions used by minimax.
@@ -531,18 +352,13 @@ class Bound:
             int | float: The evaluation result as an integer, except if the result is infinity
             (which is considered a float)
         """
-        player = len(
-            state.available_moves(
-                state.player_piece,
-                self.state_history))
-        opponent = len(
-            state.available_moves(
-                state.get_opponent_piece(),
-                self.state_history))
+        player = state.count_moves(state.player_piece, self.state_history)
+        opponent = state.count_moves(
+            state.get_opponent_piece(), self.state_history)
         value = player - opponent
-        if 0 in state.list_moves(state.get_opponent_piece()):
+        if state.mobility_product(state.get_opponent_piece()) == 0:
             value = math.inf
-        elif 0 in state.list_moves(state.player_piece):
+        elif state.mobility_product(state.player_piece) == 0:
             value = -math.inf
         return value if caller == state.player_piece else -value
 
@@ -557,8 +373,8 @@ class Bound:
             int | float: The evaluation result as an integer, except if the result is infinity
             (which is considered a float)
         """
-        player = numpy.prod(state.list_moves(state.player_piece))
-        opponent = numpy.prod(state.list_moves(state.get_opponent_piece()))
+        player = state.mobility_product(state.player_piece)
+        opponent = state.mobility_product(state.get_opponent_piece())
         value = player - opponent
         if opponent == 0:
             value = math.inf
@@ -596,8 +412,8 @@ class Bound:
             int | float: The evaluation result as an integer, except if the result is infinity
             (which is considered a float)
         """
-        player = numpy.prod(state.list_moves(state.player_piece))
-        opponent = numpy.prod(state.list_moves(state.get_opponent_piece()))
+        player = state.mobility_product(state.player_piece)
+        opponent = state.mobility_product(state.get_opponent_piece())
         value = player - opponent + state.count_middle_pieces(
             state.player_piece)
         if opponent == 0:
@@ -606,135 +422,514 @@ class Bound:
             value = -math.inf
         return value if caller == state.player_piece else -value
 
-    def execute_minimax_move(self, evaluate_func: Callable, depth: int):
+    def execute_minimax_move(
+            self, evaluate_func: Callable, depth: int, time_limit: float = None):
         """Run minimax to evaluate possible moves and execute one of the best.
+        If a time limit is given, the search is deepened iteratively, from depth 0 up to the given depth,
+        and the move is chosen from the deepest search completed within the limit.
 
         Args:
             evaluate_func (Callable): The evaluation function to be used in the algorithm.
             depth (int): The algorithm's depth, excluding the call to this function.
+            time_limit (float, optional): The time available for the move, in seconds.
+            Defaults to None (the search always reaches the given depth).
         """
-        move_eval_list = []
-        for move in self.state.available_moves(
-                self.state.player_piece,
-                self.state_history):
-            history_copy = deepcopy(self.state_history)
-            state_copy = deepcopy(self.state)
-            state_copy.move(move[0], move[1], history_copy)
-            history_copy.append(state_copy)
-            minimax_val = minimax(
-                state_copy, depth, False, -math.inf, math.inf, history_copy,
-                evaluate_func, self.state.player_piece)
-            move_eval_list.append((move, minimax_val))
-            if minimax_val == math.inf:
-                break
+        if self.execute_tablebase_move() or self.execute_winning_move():
+            return
+        table = self.transposition_tables[self.state.player_piece]
+        table.new_search()
+        orderer = self.move_orderers[self.state.player_piece]
+        orderer.new_search()
+        if time_limit is None:
+            move_eval_list = self.search_root(
+                evaluate_func, depth, table, orderer=orderer)
+        else:
+            deadline = time.perf_counter() + time_limit
+            # The shallowest search always completes, so there is a move to play
+            move_eval_list = self.search_root(
+                evaluate_func, 0, table, orderer=orderer)
+            completed_depth = 0
+            while (completed_depth < depth
+                   and abs(move_eval_list[0][1]) != math.inf):
+                try:
+                    move_eval_list = self.search_root(
+                        evaluate_func, completed_depth + 1, table, deadline,
+                        move_eval_list[0][0], orderer)
+                except SearchTimeout:
+                    break
+                completed_depth += 1
 
-        move_eval_list = sorted(
-            move_eval_list, key=lambda k: (k[1], k[0][1]), reverse=True)
         move_eval_list = list(
             filter(
                 lambda k: k[1] == move_eval_list[0][1],
                 move_eval_list))
 
         best_move = move_eval_list[random.randint(0, len(move_eval_list)-1)][0]
-        print(
-            f"Best Move ({self.state.player_piece.name}): {best_move}, value {move_eval_list[0][1]}")
+        if time_limit is None:
+            self.report(
+                f"Best Move ({self.state.player_piece.name}): {best_move}, value {move_eval_list[0][1]}")
+        else:
+            self.report(
+                f"Best Move ({self.state.player_piece.name}): {best_move}, value {move_eval_list[0][1]}, "
+                f"depth {completed_depth}")
         self.state.move(best_move[0], best_move[1], self.state_history)
         self.state.update_winner()
+        self.state_history.append(self.state.get_hash())
+
+    def search_root(
+            self, evaluate_func: Callable, depth: int, table: TranspositionTable,
+            deadline: float = None, first_move: tuple = None,
+            orderer: MoveOrderer = None) -> list:
+        """Evaluate every available move of the current state with minimax.
+
+        Args:
+            evaluate_func (Callable): The evaluation function to be used in the algorithm.
+            depth (int): The algorithm's depth, excluding the call to this function.
+            table (TranspositionTable): The table storing the results of searched positions.
+            deadline (float, optional): The time.perf_counter() value at which the search is aborted.
+            Defaults to None (no deadline).
+            first_move (tuple, optional): A move to search before the others. Defaults to None.
+            orderer (MoveOrderer, optional): The move ordering heuristics. Defaults to None.
+
+        Raises:
+            SearchTimeout: The deadline passed before the search was completed.
+
+        Returns:
+            list: List of tuples in the format (move, value), sorted from best to worst.
+        """
+        # The search walks the tree by making and unmaking moves on a single copy
         state_copy = deepcopy(self.state)
-        self.state_history.append(state_copy)
+        history_copy = self.state_history.copy()
+        caller = self.state.player_piece
+        moves = state_copy.available_moves(caller, history_copy)
+        if orderer is not None:
+            moves = orderer.order_root(state_copy, moves, first_move)
+        elif first_move in moves:
+            moves.remove(first_move)
+            moves.insert(0, first_move)
+
+        if self.workers > 1 and depth > 0 and len(moves) > 1:
+            results = self.search_root_parallel(
+                state_copy, history_copy, moves, evaluate_func, depth, table,
+                deadline, orderer)
+        else:
+            results = []
+            alpha = -math.inf
+            for move in moves:
+                minimax_val = search_move(
+                    state_copy, history_copy, move, depth, alpha,
+                    evaluate_func, caller, table, deadline, orderer)
+                results.append((move, minimax_val, alpha))
+                alpha = max(alpha, minimax_val)
+                if minimax_val == math.inf:
+                    break
+
+        # A move scoring exactly the alpha it was searched with may be worse than that score,
+        # so moves tied with the best one are searched again with a full window to settle the tie
+        best_val = max(value for (_, value, _) in results)
+        move_eval_list = []
+        for move, minimax_val, alpha in results:
+            if minimax_val == best_val == alpha != -math.inf:
+                minimax_val = search_move(
+                    state_copy, history_copy, move, depth, -math.inf,
+                    evaluate_func, caller, table, deadline, orderer)
+            move_eval_list.append((move, minimax_val))
+
+        return sorted(
+            move_eval_list, key=lambda k: (k[1], k[0][1], k[0][0]),
+            reverse=True)
+
+    def search_root_parallel(
+            self, state: State, state_history: History, moves: list,
+            evaluate_func: Callable, depth: int, table: TranspositionTable,
+            deadline: float = None, orderer: MoveOrderer = None) -> list:
+        """Evaluate the given root moves on the game's process pool, following Young Brothers Wait:
+        the first move is searched here, and its score is the alpha the remaining moves start with.
+        Each move sent to a worker uses the best score known when it is sent.
 
-    def execute_mcts(self, iteration_total: int = 50):
-        """Run Monte Carlo Tree Search with a given number of iterations to rate
+        Args:
+            state (State): A copy of the current state.
+            state_history (History): A copy of the game's state history.
+            moves (list): The available moves, in the order they are searched.
+            evaluate_func (Callable): The evaluation function to be used in the algorithm.
+            depth (int): The algorithm's depth, excluding the call to this function.
+            table (TranspositionTable): The table used for the first move.
+            deadline (float, optional): The time.perf_counter() value at which the search is aborted.
+            Defaults to None (no deadline).
+            orderer (MoveOrderer, optional): The move ordering heuristics used for the first move,
+            which also count the nodes visited by the workers. Defaults to None.
+
+        Raises:
+            SearchTimeout: The deadline passed before the search was completed.
+
+        Returns:
+            list: List of tuples in the format (move, value, alpha), in the order of the given moves,
+            ending on the first winning move (the moves after it are not searched by a serial search either).
+        """
+        caller = state.player_piece
+        first_val = search_move(
+            state, state_history, moves[0], depth, -math.inf, evaluate_func,
+            caller, table, deadline, orderer)
+        results = {0: (first_val, -math.inf)}
+        alpha = first_val
+        # Index of the first move found to win, later moves are no longer needed
+        limit = 0 if first_val == math.inf else len(moves)
+
+        pool = self.get_search_pool()
+        pending = {}
+        next_index = 1
+
+        def submit(index: int):
+            time_left = None
+            if deadline is not None:
+                time_left = deadline - time.perf_counter()
+            future = pool.submit(
+                search_move_worker, state, state_history, moves[index], depth,
+                alpha, evaluate_func.__name__, caller, table.generation,
+                time_left)
+            pending[future] = (index, alpha)
+
+        while next_index < limit and len(pending) < self.workers:
+            submit(next_index)
+            next_index += 1
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                index, move_alpha = pending.pop(future)
+                try:
+                    value, nodes = future.result()
+                except SearchTimeout:
+                    for other in pending:
+                        other.cancel()
+                    raise
+                if orderer is not None:
+                    orderer.add_nodes(nodes)
+                results[index] = (value, move_alpha)
+                alpha = max(alpha, value)
+                if value == math.inf:
+                    limit = min(limit, index)
+            for future in [f for f, (index, _) in pending.items() if index > limit]:
+                future.cancel()
+                del pending[future]
+            while next_index < limit and len(pending) < self.workers:
+                submit(next_index)
+                next_index += 1
+
+        return [(moves[index], *results[index])
+                for index in range(min(limit + 1, len(moves)))]
+
+    def get_search_pool(self) -> ProcessPoolExecutor:
+        """Get the process pool used by parallel searches, starting it on first use.
+        It is kept for the whole game, so the workers only start once.
+
+        Returns:
+            ProcessPoolExecutor: The process pool.
+        """
+        if self.search_pool is None:
+            self.search_pool = ProcessPoolExecutor(
+                self.workers, initializer=init_search_worker,
+                initargs=(self.outer_length, self.table_size, self.move_ordering))
+        return self.search_pool
+
+    def close_search_pool(self):
+        """Shut down the process pool used by parallel searches, if it was started.
+        """
+        if self.search_pool is not None:
+            self.search_pool.shutdown(cancel_futures=True)
+            self.search_pool = None
+
+    def execute_mcts(self, iteration_total: int = 50, time_limit: float = None):
+        """Run Monte Carlo Tree Search with a given number of iterations (or time limit) to rate
         available moves and execute a (potentially) good one.
+        The search stops early if a move wins right away or the most visited move can no longer be overtaken.
+        The tree of the player's previous search is reused if it reached the current position
+        (except with root parallelism, where the trees live in the worker processes).
 
         Args:
             iteration_total (int, optional): The number of iterations. Defaults to 50.
+            time_limit (float, optional): The time limit for the search, in seconds,
+            which then runs iterations until it runs out instead. Defaults to None.
         """
-        state_copy = deepcopy(self.state)
-        history_copy = deepcopy(self.state_history)
-
-        mcts_root = MCTS_node((state_copy, history_copy), None, None)
-
-        mcts = MCTS(mcts_root, self.state.player_piece)
-        iteration = iteration_total
-
-        while (iteration > 0):
-            # Select
-            node = mcts.select()
-            # Expand
-            leaf = mcts.expand(node)
-            # Simulate
-            result = mcts.simulate(leaf)
-            # Back Propagate
-            mcts.back_propagate(leaf, result)
-            iteration -= 1
-
-        best_move = mcts.best_choice()
-        print(
-            f"Best Move ({self.state.player_piece.name}): {best_move.move}, value {best_move.value}")
+        if self.execute_tablebase_move():
+            return
+        start = time.perf_counter()
+        if time_limit is None:
+            deadline = None
+        else:
+            iteration_total = None
+            deadline = start + time_limit
+
+        # Playouts per second, measured over the whole search unless the rollout engine gives it
+        playout_rate = None
+        if self.workers > 1 and self.mcts_parallelism == "root":
+            best_move, value, iterations, playouts = self.search_mcts_root_parallel(
+                iteration_total, deadline)
+        else:
+            mcts = self.mcts_trees[self.state.player_piece]
+            if mcts is None or not mcts.reroot(self.state, self.state_history):
+                mcts = MCTS(
+                    self.state, self.state_history, self.state.player_piece,
+                    max_nodes=self.mcts_nodes)
+                self.mcts_trees[self.state.player_piece] = mcts
+
+            if mcts.winning_move is not None:
+                best_move, value, iterations, playouts = mcts.winning_move, math.inf, 0, 0
+            else:
+                if self.workers > 1:
+                    iterations, playouts = self.search_mcts_leaf_parallel(
+                        mcts, iteration_total, deadline)
+                else:
+                    # The tree and its rollout engine are kept across turns, so only this search is counted
+                    mcts.rollout.reset_counters()
+                    iterations = playouts = mcts.search(iteration_total, deadline)
+                    # The rollout engine times the playouts themselves, leaving out the tree's work
+                    playout_rate = mcts.rollout.playouts_per_second()
+                best_node = mcts.best_choice()
+                best_move, value = best_node.move, best_node.value
+
+        elapsed = time.perf_counter() - start
+        if playout_rate is None:
+            playout_rate = playouts / elapsed
+        self.report(
+            f"Best Move ({self.state.player_piece.name}): {best_move}, value {value}"
+            f" ({iterations} iterations, {iterations / elapsed:.0f} iterations/s,"
+            f" {playout_rate:.0f} playouts/s)")
         self.state.move(
-            best_move.move[0],
-            best_move.move[1],
+            best_move[0],
+            best_move[1],
             self.state_history)
         self.state.update_winner()
-        state_copy = deepcopy(self.state)
-        self.state_history.append(state_copy)
+        self.state_history.append(self.state.get_hash())
+
+    def execute_tablebase_move(self) -> bool:
+        """Execute the tablebase's best move, if the current position is won or lost according to the tablebase.
+
+        Returns:
+            bool: True if a move was executed, False otherwise.
+        """
+        if self.tablebase is None:
+            return False
+        move = self.tablebase.best_move(self.state, self.state_history)
+        if move is None:
+            return False
+        outcome, distance = self.tablebase.probe(self.state)
+        self.report(
+            f"Tablebase Move ({self.state.player_piece.name}): {move}, {outcome.name} in {distance}")
+        self.state.move(move[0], move[1], self.state_history)
+        self.state.update_winner()
+        self.state_history.append(self.state.get_hash())
+        return True
+
+    def execute_winning_move(self) -> bool:
+        """Execute a move winning the game right away, if there is one, without searching.
+
+        Returns:
+            bool: True if a move was executed, False otherwise.
+        """
+        move = self.state.winning_move(self.state.player_piece, self.state_history)
+        if move is None:
+            return False
+        self.report(
+            f"Best Move ({self.state.player_piece.name}): {move}, value {math.inf}")
+        self.state.move(move[0], move[1], self.state_history)
+        self.state.update_winner()
+        self.state_history.append(self.state.get_hash())
+        return True
+
+    def search_mcts_root_parallel(
+            self, iteration_total: int = None, deadline: float = None) -> tuple:
+        """Grow an independent MCTS tree in each worker process and merge their root moves.
+        The workers' random generators are seeded from this process', so the chosen move
+        only depends on the game's seed and the number of workers (without a deadline).
+
+        Args:
+            iteration_total (int, optional): The maximum number of iterations of each tree.
+            Defaults to None (no maximum).
+            deadline (float, optional): The time (as given by time.perf_counter) at which the searches stop.
+            Defaults to None (no deadline). At least one of the limits must be given.
+
+        Returns:
+            tuple: The most visited move over all trees (ties broken by the highest value, then the lowest move),
+            its total value and the total number of iterations and playouts.
+        """
+        pool = self.get_search_pool()
+        seeds = [random.getrandbits(64) for _ in range(self.workers)]
+        time_left = None
+        if deadline is not None:
+            time_left = deadline - time.perf_counter()
+        futures = [
+            pool.submit(
+                mcts_root_worker, self.state, self.state_history,
+                self.mcts_nodes, seed, iteration_total, time_left)
+            for seed in seeds]
+        totals = {}
+        iterations = 0
+        for future in futures:
+            winning_move, worker_iterations, moves = future.result()
+            if winning_move is not None:
+                return winning_move, math.inf, 0, 0
+            iterations += worker_iterations
+            for move, (visits, value) in moves.items():
+                total_visits, total_value = totals.get(move, (0, 0))
+                totals[move] = (total_visits + visits, total_value + value)
+        best_move = max(sorted(totals), key=lambda move: totals[move])
+        return best_move, totals[best_move][1], iterations, iterations
+
+    def search_mcts_leaf_parallel(
+            self, mcts: MCTS, iteration_total: int = None, deadline: float = None,
+            rollouts: int = 8) -> tuple:
+        """Grow an MCTS tree, selecting batches of one leaf per worker process and running the leaves' rollouts
+        in the workers. Each selected path gets a virtual loss until its results arrive, so the leaves of a batch differ.
+        The workers' random generators are seeded from this process', so the tree only depends on the game's seed
+        and the number of workers (without a deadline).
+        Like MCTS.search, it stops early once the most visited root move can no longer be overtaken.
+
+        Args:
+            mcts (MCTS): The search to grow.
+            iteration_total (int, optional): The maximum number of leaves to expand. Defaults to None (no maximum).
+            deadline (float, optional): The time (as given by time.perf_counter) at which the search stops.
+            Defaults to None (no deadline). At least one of the limits must be given.
+            rollouts (int, optional): The number of rollouts run from each leaf. Defaults to 8.
+
+        Returns:
+            tuple: The number of leaves expanded and of playouts.
+        """
+        pool = self.get_search_pool()
+        start = time.perf_counter()
+        iterations = 0
+        while mcts.root.children or mcts.root.untried_moves:
+            remaining = remaining_iterations(
+                iterations, iteration_total, start, deadline)
+            if mcts.root.children and (
+                    remaining <= 0 or mcts.decided(remaining * rollouts)):
+                break
+            leaves = []
+            futures = []
+            for _ in range(int(min(self.workers, max(remaining, 1)))):
+                leaf = mcts.expand(mcts.select())
+                mcts.virtual_loss(leaf)
+                # Pickled later by the pool, so the position is copied before its moves are taken back
+                futures.append(pool.submit(
+                    mcts_rollout_worker, deepcopy(mcts.state),
+                    mcts.state_history.copy(), mcts.player, rollouts,
+                    random.getrandbits(64)))
+                leaves.append(leaf)
+                mcts.take_back()
+            for leaf, future in zip(leaves, futures):
+                mcts.virtual_loss(leaf, -1)
+                mcts.back_propagate(leaf, future.result(), rollouts)
+            iterations += len(leaves)
+        return iterations, iterations * rollouts
+
+
+# Game used by each worker process of a parallel search, with its own tables that last for the whole game
+worker_game = None
+
+
+def init_search_worker(outer_length: int, table_size: int, move_ordering: bool):
+    """Prepare a worker process for parallel searches.
+
+    Args:
+        outer_length (int): The length of the game board's outer layer.
+        table_size (int): The maximum number of entries in the worker's transposition tables.
+        move_ordering (bool): If the worker's searches sort moves with the move ordering heuristics.
+    """
+    global worker_game
+    worker_game = Bound(
+        Player(1, Piece.Red), Player(2, Piece.Black), outer_length,
+        table_size=table_size, move_ordering=move_ordering, headless=True,
+        reuse_scores=False)
+
 
+def search_move_worker(
+        state: State, state_history: History, move: tuple, depth: int,
+        alpha: int | float, evaluate_name: str, caller: Piece, generation: int,
+        time_left: float = None) -> tuple:
+    """Evaluate a move of the caller with minimax inside a worker process.
 
-def minimax(
-        state: State, depth: int, maximizing: bool, alpha: int, beta: int,
-        state_history: list, evaluate_func: Callable, caller: Piece) -> int | float:
-    """The minimax algorithm. Select the best possible move considering
-    the caller and his opponent's choices (depending on the depth).
+    Args:
+        state (State): The game state, in which the caller is the player to move.
+        state_history (History): The game's state history.
+        move (tuple): The move, in the format (chosen_piece_idx, target_fork_idx).
+        depth (int): The algorithm's depth, excluding the move.
+        alpha (int | float): The lower value bound to consider.
+        evaluate_name (str): The name of the Bound method that will evaluate the board.
+        caller (Piece): The piece type of the player making the move.
+        generation (int): The search the move belongs to, in the searching game's table.
+        time_left (float, optional): The time available for the search, in seconds.
+        Defaults to None (no deadline).
+
+    Raises:
+        SearchTimeout: The time ran out before the search was completed.
+
+    Returns:
+        tuple: The evaluation result and the number of nodes visited.
+    """
+    deadline = None
+    if time_left is not None:
+        deadline = time.perf_counter() + time_left
+    # The evaluation functions read the game history of the searching game
+    worker_game.state_history = state_history
+    table = worker_game.transposition_tables[caller]
+    orderer = worker_game.move_orderers[caller]
+    if table.generation != generation:
+        # A new search of the searching game, as in execute_minimax_move
+        table.new_search(generation)
+        orderer.new_search()
+    nodes = orderer.nodes
+    value = search_move(
+        state, state_history.copy(), move, depth, alpha,
+        getattr(worker_game, evaluate_name), caller, table, deadline, orderer)
+    return value, orderer.nodes - nodes
+
+
+def mcts_root_worker(
+        state: State, state_history: History, max_nodes: int, seed: int,
+        iteration_total: int = None, time_left: float = None) -> tuple:
+    """Grow an MCTS tree for the player to move inside a worker process.
 
     Args:
         state (State): The game state.
-        depth (int): The algorithm's depth.
-        maximizing (bool): If the current depth stores the maximum value (True) or not (False).
-        alpha (int): The lower value bound to consider.
-        beta (int): The upper value bound to consider.
-        state_history (list): The game's state history.
-        evaluate_func (Callable): The function that will evaluate the board.
-        caller (Piece): The piece type of the player who called the first iteration of minimax.
+        state_history (History): The game's state history.
+        max_nodes (int): The maximum number of nodes in the tree.
+        seed (int): The seed of the worker's random generator for this search.
+        iteration_total (int, optional): The maximum number of iterations. Defaults to None (no maximum).
+        time_left (float, optional): The time available for the search, in seconds.
+        Defaults to None (no deadline). At least one of the limits must be given.
 
     Returns:
-        int | float: The evaluation result as an integer, except if the result is infinity
-        (which is considered a float)
+        tuple: The move that wins right away (or None), the number of iterations
+        and a dict with the visits and value of each root move, as tuples indexed by the moves.
     """
-    if depth == 0 or state.is_final():
-        return evaluate_func(state, caller)
-    if maximizing:
-        max_eval = -math.inf
-        for move in state.available_moves(
-                state.player_piece,
-                state_history):
-            state_copy = deepcopy(state)
-            history_copy = deepcopy(state_history)
-            state_copy.move(move[0], move[1], history_copy)
-            history_copy.append(state_copy)
-            evaluation = minimax(
-                state_copy, depth - 1, False, alpha, beta, history_copy,
-                evaluate_func, caller)
-            max_eval = max(max_eval, evaluation)
-            alpha = max(alpha, evaluation)
-            if beta <= alpha:
-                break
-        return max_eval
-
-    min_eval = math.inf
-    for move in state.available_moves(state.player_piece, state_history):
-        state_copy = deepcopy(state)
-        history_copy = deepcopy(state_history)
-        state_copy.move(move[0], move[1], history_copy)
-        history_copy.append(state_copy)
-        evaluation = minimax(
-            state_copy, depth - 1, True, alpha, beta, history_copy,
-            evaluate_func, caller)
-        min_eval = min(min_eval, evaluation)
-        beta = min(beta, evaluation)
-        if beta <= alpha:
-            break
-    return min_eval
+    deadline = None
+    if time_left is not None:
+        deadline = time.perf_counter() + time_left
+    random.seed(seed)
+    mcts = MCTS(state, state_history, state.player_piece, max_nodes=max_nodes)
+    iterations = mcts.search(iteration_total, deadline)
+    return mcts.winning_move, iterations, {
+        child.move: (child.visits, child.value) for child in mcts.root.children}
+
+
+def mcts_rollout_worker(
+        state: State, state_history: History, player: Piece, rollouts: int,
+        seed: int) -> int:
+    """Run MCTS rollouts from a leaf's position inside a worker process.
+
+    Args:
+        state (State): The leaf's state.
+        state_history (History): The leaf's state history.
+        player (Piece): The player that is calling MCTS.
+        rollouts (int): The number of rollouts.
+        seed (int): The seed of the worker's random generator for these rollouts.
+
+    Returns:
+        int: The rollouts won by the player minus the ones lost.
+    """
+    random.seed(seed)
+    rollout = Rollout(state.board.outer_length)
+    return sum(1 if rollout.play(state, state_history) == player else -1
+               for _ in range(rollouts))
 
 
 def one_game():
@@ -803,15 +998,21 @@ def example():
         run = False
 
 
-def run_games(n_games: int = 100, rev_start_order: bool = False, bot_1: int = 1,
-              bot_2: int = 1) -> dict:
-    """Run an arbitrary amount of computer vs computer games while storing the wins for each player.
+def play_games(
+        game_numbers: range, rev_start_order: bool, bot_1: int, bot_2: int,
+        seed: int, results_path: str = None) -> dict:
+    """Play a batch of headless computer vs computer games, seeding each one from the run's seed
+    and the game's number, so its result does not depend on the batch it is played in.
+    Each game's record can be appended to a results log as soon as it ends.
 
     Args:
-        n_games (int, optional): The amount of games to run. Defaults to 100.
-        rev_start_order (bool, optional): True if the Black pieces start, False otherwise. Defaults to False.
-        bot_1 (int, optional): The first bot's difficulty. Defaults to 1.
-        bot_2 (int, optional): The second bot's difficulty. Defaults to 1.
+        game_numbers (range): The numbers of the games to play, within the run.
+        rev_start_order (bool): True if the Black pieces start, False otherwise.
+        bot_1 (int): The first bot's difficulty.
+        bot_2 (int): The second bot's difficulty.
+        seed (int): The run's seed.
+        results_path (str, optional): The path of the results log (see results.py).
+        Defaults to None (no records are stored).
 
     Returns:
         dict: A dictionary with the two piece types as keys and their respective amount
@@ -820,14 +1021,59 @@ def run_games(n_games: int = 100, rev_start_order: bool = False, bot_1: int = 1,
     p1 = Player(1, Piece(Piece.Red), "Red")
     p2 = Player(2, Piece(Piece.Black), "Black")
     results = {"Red": 0, "Black": 0}
-    for i in range(n_games):
+    for i in game_numbers:
+        game_seed = f"{seed}-{i}"
+        random.seed(game_seed)
         if rev_start_order:
-            game = Bound(p2, p1, 5, 19)
+            game = Bound(p2, p1, 5, 19, headless=True)
         else:
-            game = Bound(p1, p2, 5, 0)
+            game = Bound(p1, p2, 5, 0, headless=True)
         winner = game.play(3, bot_1, bot_2)
-        print(f"Winner: {winner.get_name()}")
         results[str(winner.piece.name)] += 1
-        print(i)
-    print(results)
+        if results_path is not None:
+            append_result(game.get_record(bot_1, bot_2, game_seed), results_path)
+    return results
+
+
+def run_games(n_games: int = 100, rev_start_order: bool = False, bot_1: int = 1,
+              bot_2: int = 1, workers: int = 1, seed: int = None,
+              results_path: str = None) -> dict:
+    """Run an arbitrary amount of headless computer vs computer games while storing the wins for each player.
+    The games are split into one batch per worker process.
+
+    Args:
+        n_games (int, optional): The amount of games to run. Defaults to 100.
+        rev_start_order (bool, optional): True if the Black pieces start, False otherwise. Defaults to False.
+        bot_1 (int, optional): The first bot's difficulty. Defaults to 1.
+        bot_2 (int, optional): The second bot's difficulty. Defaults to 1.
+        workers (int, optional): The number of processes playing the games. Defaults to 1.
+        seed (int, optional): The seed the games are played with. The same seed always gives the same results,
+        whatever the number of workers. Defaults to None (a random seed).
+        results_path (str, optional): The path of the results log every worker appends the game records to
+        (see results.py). Defaults to None (no records are stored).
+
+    Returns:
+        dict: A dictionary with the two piece types as keys and their respective amount
+        of wins as values.
+    """
+    if seed is None:
+        seed = random.getrandbits(32)
+    batches = [range(w, n_games, workers) for w in range(workers)]
+    if workers == 1:
+        batch_results = [play_games(
+            batches[0], rev_start_order, bot_1, bot_2, seed, results_path)]
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            futures = [
+                pool.submit(
+                    play_games, batch, rev_start_order, bot_1, bot_2, seed,
+                    results_path)
+                for batch in batches]
+            batch_results = [future.result() for future in futures]
+
+    results = {"Red": 0, "Black": 0}
+    for batch_result in batch_results:
+        for piece, wins in batch_result.items():
+            results[piece] += wins
+    print(f"Seed {seed}: {results}")
     return results
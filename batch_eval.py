@@ -0,0 +1,150 @@
+import math
+import numpy
+from bitboard import get_topology
+from constants import Piece
+
+
+class BatchEvaluator:
+    """Class scoring many positions of a board at once with NumPy. Positions are given as an occupancy array,
+    with one row per position and one column per fork holding the value of the piece on it.
+    The board's adjacency is taken once per outer layer length from its topology, as a dense matrix and in CSR form.
+    """
+
+    def __init__(self, outer_length: int = 5):
+        """Initialize the evaluator for boards with the given outer layer length.
+
+        Args:
+            outer_length (int, optional): The length of the outer layer. Defaults to 5.
+        """
+        topology = get_topology(outer_length)
+        size = topology.size
+        self.topology = topology
+        # The topology's CSR form: the neighbours of fork i are indices[indptr[i]:indptr[i + 1]]
+        self.indptr = numpy.array(topology.indptr)
+        self.indices = numpy.array(topology.indices)
+        self.adjacency = numpy.zeros((size, size), dtype=numpy.int32)
+        self.adjacency[numpy.repeat(
+            numpy.arange(size), numpy.diff(self.indptr)), self.indices] = 1
+        self.middle = numpy.array(
+            [topology.middle_mask >> i & 1 for i in range(size)], dtype=bool)
+        self.shifts = numpy.arange(size, dtype=numpy.int64)
+
+    def occupancy(self, states: list) -> numpy.ndarray:
+        """Build the occupancy array of a list of states.
+
+        Args:
+            states (list): The states, whose boards must have this evaluator's outer layer length.
+
+        Returns:
+            numpy.ndarray: An array of shape (positions, forks) with the piece value on each fork.
+        """
+        red = numpy.array(
+            [state.board.bitboards[1] for state in states], dtype=numpy.int64)
+        black = numpy.array(
+            [state.board.bitboards[2] for state in states], dtype=numpy.int64)
+        return (((red[:, None] >> self.shifts) & 1)
+                + 2 * ((black[:, None] >> self.shifts) & 1)).astype(numpy.int8)
+
+    def child_occupancy(self, state, moves: list) -> numpy.ndarray:
+        """Build the occupancy array of the positions reached by each of the state player's moves.
+
+        Args:
+            state (State): The state the moves are played from.
+            moves (list): The moves, in the format (chosen_piece_idx, target_fork_idx).
+
+        Returns:
+            numpy.ndarray: An array of shape (moves, forks) with the piece value on each fork.
+        """
+        occupancy = numpy.repeat(self.occupancy([state]), len(moves), axis=0)
+        rows = numpy.arange(len(moves))
+        curr, target = numpy.array(moves).reshape(-1, 2).T
+        occupancy[rows, curr] = 0
+        occupancy[rows, target] = state.player_piece.value
+        return occupancy
+
+    def features(self, occupancy: numpy.ndarray) -> dict:
+        """Compute the mobility features of a batch of positions.
+
+        Args:
+            occupancy (numpy.ndarray): The positions' occupancy array.
+
+        Returns:
+            dict: The arrays "empty_neighbours", of shape (positions, forks), and "sums", "products",
+            "middle" and "trapped", of shape (3, positions) and indexed by piece value
+            (the row of Piece.Empty is unused), holding for each player the sum and product of the number
+            of moves of their pieces, their pieces in the middle layer and if any of their pieces is trapped.
+        """
+        empty_neighbours = (occupancy == 0).astype(numpy.int32) @ self.adjacency
+        positions = occupancy.shape[0]
+        features = {
+            "empty_neighbours": empty_neighbours,
+            "sums": numpy.zeros((3, positions), dtype=numpy.int64),
+            "products": numpy.ones((3, positions), dtype=numpy.int64),
+            "middle": numpy.zeros((3, positions), dtype=numpy.int64),
+            "trapped": numpy.zeros((3, positions), dtype=bool)}
+        for side in (1, 2):
+            pieces = occupancy == side
+            moves = numpy.where(pieces, empty_neighbours, 0)
+            features["sums"][side] = moves.sum(axis=1)
+            features["products"][side] = numpy.where(
+                pieces, empty_neighbours, 1).prod(axis=1)
+            features["middle"][side] = (pieces & self.middle).sum(axis=1)
+            features["trapped"][side] = (pieces & (empty_neighbours == 0)).any(axis=1)
+        return features
+
+    def evaluate_state_2(
+            self, occupancy: numpy.ndarray, player_piece: Piece,
+            caller: Piece) -> numpy.ndarray:
+        """Evaluates a batch of boards like Bound.evaluate_state_2:
+        prod(no_player_moves) - prod(no_opp_moves)
+
+        Args:
+            occupancy (numpy.ndarray): The positions' occupancy array.
+            player_piece (Piece): The piece type of the player to move in every position.
+            caller (Piece): The piece type of the player that called the strategy.
+
+        Returns:
+            numpy.ndarray: The evaluation results, as floats (so they can be infinite).
+        """
+        return self._evaluate(occupancy, player_piece, caller, False)
+
+    def evaluate_state_4(
+            self, occupancy: numpy.ndarray, player_piece: Piece,
+            caller: Piece) -> numpy.ndarray:
+        """Evaluates a batch of boards like Bound.evaluate_state_4:
+        prod(no_player_moves) - prod(no_opp_moves) + no_player_middle_pieces
+
+        Args:
+            occupancy (numpy.ndarray): The positions' occupancy array.
+            player_piece (Piece): The piece type of the player to move in every position.
+            caller (Piece): The piece type of the player that called the strategy.
+
+        Returns:
+            numpy.ndarray: The evaluation results, as floats (so they can be infinite).
+        """
+        return self._evaluate(occupancy, player_piece, caller, True)
+
+    def _evaluate(
+            self, occupancy: numpy.ndarray, player_piece: Piece, caller: Piece,
+            middle: bool) -> numpy.ndarray:
+        """Evaluates a batch of boards by their mobility products, optionally adding the pieces
+        of the player to move in the middle layer.
+
+        Args:
+            occupancy (numpy.ndarray): The positions' occupancy array.
+            player_piece (Piece): The piece type of the player to move in every position.
+            caller (Piece): The piece type of the player that called the strategy.
+            middle (bool): If the player's pieces in the middle layer are added to the result.
+
+        Returns:
+            numpy.ndarray: The evaluation results, as floats (so they can be infinite).
+        """
+        features = self.features(occupancy)
+        player = features["products"][player_piece.value]
+        opponent = features["products"][3 - player_piece.value]
+        value = (player - opponent).astype(numpy.float64)
+        if middle:
+            value += features["middle"][player_piece.value]
+        value = numpy.where(player == 0, -math.inf, value)
+        value = numpy.where(opponent == 0, math.inf, value)
+        return value if caller == player_piece else -value
@@ -0,0 +1,138 @@
+import random
+from functools import lru_cache
+
+
+def build_neighbours(outer_length: int) -> tuple:
+    """Compute the forks connected to each fork of a board with the given outer layer length.
+    Forks 0 to outer_length - 1 form the outer layer, the next outer_length * 2 the middle layer
+    and the last outer_length the inner layer.
+
+    Args:
+        outer_length (int): The length of the outer layer.
+
+    Returns:
+        tuple: The neighbour indices of each of the outer_length * 4 forks.
+    """
+    size = outer_length * 4
+    neighbours = [[] for _ in range(size)]
+
+    def connect(i: int, j: int):
+        neighbours[i].append(j)
+        neighbours[j].append(i)
+
+    # Connect every fork of index i with the fork of index i+1, except for the last fork
+    for i in range(size - 1):
+        connect(i, i + 1)
+        # Connect forks of the outer layer with the forks directly below them
+        if i < outer_length - 1:
+            connect(i, outer_length + 2 + i * 2)
+        # Connect forks of the inner layer with the forks directly above them
+        elif outer_length < i < outer_length * 3 - 1 and (i - outer_length) % 2:
+            connect(i, outer_length * 3 + 1 + (i - outer_length - 1) // 2)
+
+    # Create loops inside the different layers
+    connect(outer_length - 1, 0)
+    connect(outer_length * 3 - 1, outer_length)
+    connect(size - 1, outer_length * 3)
+    return tuple(tuple(fork_neighbours) for fork_neighbours in neighbours)
+
+
+class Topology:
+    """Class storing the precomputed connectivity of a board with a given outer layer length.
+    Fork i is represented by bit i of an integer mask.
+    A topology is shared by every board of its outer layer length, so it cannot be modified once built.
+    """
+
+    def __init__(self, outer_length: int):
+        """Compute the neighbour lists and masks of every fork of the board.
+
+        Args:
+            outer_length (int): The length of the outer layer.
+        """
+        set_attribute = super().__setattr__
+        size = outer_length * 4
+        full_mask = (1 << size) - 1
+        outer_mask = (1 << outer_length) - 1
+        neighbours = build_neighbours(outer_length)
+        set_attribute("outer_length", outer_length)
+        set_attribute("size", size)
+        set_attribute("full_mask", full_mask)
+        set_attribute("outer_mask", outer_mask)
+        # Every fork outside the outer layer, as counted by State.count_middle_pieces
+        set_attribute("middle_mask", full_mask & ~outer_mask)
+        # Neighbour indices keep the order the forks were connected in, which is the move generation order
+        set_attribute("neighbours", neighbours)
+        set_attribute("neighbour_masks", tuple(
+            sum(1 << j for j in neighbours[i]) for i in range(size)))
+        # CSR form: the neighbours of fork i are indices[indptr[i]:indptr[i + 1]]
+        indptr = [0]
+        for fork_neighbours in neighbours:
+            indptr.append(indptr[-1] + len(fork_neighbours))
+        set_attribute("indptr", tuple(indptr))
+        set_attribute("indices", tuple(
+            j for fork_neighbours in neighbours for j in fork_neighbours))
+
+        # Zobrist keys, seeded by the outer length so hashes match across processes.
+        # piece_keys is indexed by piece value and fork index, turn_keys by the value of the piece to move.
+        rng = random.Random(outer_length)
+        set_attribute("piece_keys", (
+            (0,) * size,
+            tuple(rng.getrandbits(64) for _ in range(size)),
+            tuple(rng.getrandbits(64) for _ in range(size))))
+        set_attribute("turn_keys", (0, 0, rng.getrandbits(64)))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Board topologies are shared and cannot be modified")
+
+    def __delattr__(self, name):
+        raise AttributeError("Board topologies are shared and cannot be modified")
+
+    def __repr__(self):
+        return f"Topology({self.outer_length})"
+
+
+@lru_cache(maxsize=None)
+def get_topology(outer_length: int) -> Topology:
+    """Get the shared topology for a given outer layer length, building it on first use.
+
+    Args:
+        outer_length (int): The length of the outer layer.
+
+    Returns:
+        Topology: The board topology.
+    """
+    return Topology(outer_length)
+
+
+def iter_bits(mask: int):
+    """Iterate over the indices of the set bits of a mask, in ascending order.
+
+    Args:
+        mask (int): The mask to iterate over.
+
+    Yields:
+        int: The index of each set bit.
+    """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def trapped_mask(topology: Topology, pieces: int, empty: int) -> int:
+    """Get the mask of pieces that have no empty fork in their neighbourhood.
+
+    Args:
+        topology (Topology): The board topology.
+        pieces (int): The mask of pieces to check.
+        empty (int): The mask of empty forks.
+
+    Returns:
+        int: The mask of trapped pieces.
+    """
+    neighbour_masks = topology.neighbour_masks
+    trapped = 0
+    for i in iter_bits(pieces):
+        if not neighbour_masks[i] & empty:
+            trapped |= 1 << i
+    return trapped
@@ -12,8 +12,33 @@ class Piece(Enum):
     Black = 2
 
 
+class NodeType(Enum):
+    """Enum class to represent how a score stored in a transposition table bounds the real value.
+
+    Args:
+        Enum (Enum): The Enum class being extended.
+    """
+    Exact = 0
+    Lower = 1
+    Upper = 2
+
+
+class Outcome(Enum):
+    """Enum class to represent the solved result of a position, seen by the player to move.
+
+    Args:
+        Enum (Enum): The Enum class being extended.
+    """
+    Draw = 0
+    Win = 1
+    Loss = 2
+
+
 # Dictionary of color names pointing to the RGB codes
 COLOR_DICT = {"Black": (0, 0, 0), "Empty": (255, 255, 255), "Red": (184, 0, 0)}
 
+# Number of past positions kept in a game's history, in which closed movement loops are looked for
+HISTORY_LENGTH = 20
+
 # Dictionary of bot difficulty values pointing to their respective names
 BOT_NAME = {1: "The Squirrel", 2: "The Raccoon", 3: "The Deer", 4: "The Fox"}
@@ -0,0 +1,876 @@
+import math
+import time
+from typing import Callable
+from Graph import Vertex, Piece
+from bitboard import get_topology, iter_bits, trapped_mask
+from constants import NodeType
+from history import History
+from ordering import MoveOrderer
+from transposition import TranspositionTable
+
+
+class SearchTimeout(Exception):
+    """Exception raised when a time-limited search runs past its deadline.
+    """
+
+
+class Player:
+    """Class representing a game's player, storing its name and piece.
+    """
+
+    def __init__(self, index: int, piece: Piece, name: str = ""):
+        """Initialize a new player.
+
+        Args:
+            index (int): The index (order) of the player. Only used to generate a default name.
+            piece (Piece): The piece that the player controls.
+            name (str, optional): The name of the player.
+        """
+        self.index = index
+        self.piece = piece
+        if name == "":
+            self.name = f"Player-{index}"
+        else:
+            self.name = name
+
+    def __repr__(self):
+        return self.name
+
+
+class Fork(Vertex):
+    """Class representing a view of a single fork of a board, which reads and writes
+    its status through the board's bitboards.
+
+    Args:
+        Vertex (Vertex): The vertex class being extended.
+    """
+
+    def __init__(self, board, index: int):
+        """Initialize a new view of the fork with the given index.
+
+        Args:
+            board (Board): The board the fork belongs to.
+            index (int): The index of the fork.
+        """
+        self.board = board
+        self.index = index
+
+    @property
+    def status(self) -> Piece:
+        return self.board.get_status(self.index)
+
+    @status.setter
+    def status(self, status: Piece):
+        self.board.set_status(self.index, status)
+
+
+class Board:
+    """Class representing a game's board. The pieces of each player are stored as an integer bitboard,
+    where bit i is set if fork i holds one of the player's pieces, and the connections between forks
+    come from a topology shared by every board with the same outer layer length.
+    """
+
+    def __init__(self, outer_length: int = 5):
+        """Initialize an empty board with the given outer layer length.
+        Its size will equal the layer's length times 4.
+
+        Args:
+            outer_length (int, optional): The length of the outer layer. Defaults to 5.
+        """
+        self.outer_length = outer_length
+        self.topology = get_topology(outer_length)
+        # Indexed by piece value, index 0 (Piece.Empty) is unused
+        self.bitboards = [0, 0, 0]
+        # Zobrist hash of the piece placement, updated on every change
+        self.zobrist = 0
+        self.count_mobility()
+
+    @property
+    def forks(self) -> dict:
+        return {i: Fork(self, i) for i in range(self.topology.size)}
+
+    @property
+    def paths(self) -> dict:
+        neighbours = self.topology.neighbours
+        return {Fork(self, i): [Fork(self, j) for j in neighbours[i]]
+                for i in range(self.topology.size)}
+
+    vertex_list = forks
+    adj_list = paths
+
+    def empty_mask(self) -> int:
+        """Get the mask of the empty forks of the board.
+
+        Returns:
+            int: The mask with a bit set for each empty fork.
+        """
+        return self.topology.full_mask & ~(self.bitboards[1] | self.bitboards[2])
+
+    def get_status(self, index: int) -> Piece:
+        """Get the type of piece stored in the fork of the given index.
+
+        Args:
+            index (int): The fork's index.
+
+        Returns:
+            Piece: The piece type stored in the fork.
+        """
+        bit = 1 << index
+        if self.bitboards[1] & bit:
+            return Piece.Red
+        if self.bitboards[2] & bit:
+            return Piece.Black
+        return Piece.Empty
+
+    def set_status(self, index: int, status: Piece):
+        """Set the type of piece stored in the fork of the given index.
+
+        Args:
+            index (int): The fork's index.
+            status (Piece): The new piece type.
+        """
+        piece_keys = self.topology.piece_keys
+        self.zobrist ^= piece_keys[self.get_status(index).value][index]
+        self.zobrist ^= piece_keys[status.value][index]
+        bit = 1 << index
+        self.bitboards[1] &= ~bit
+        self.bitboards[2] &= ~bit
+        if status != Piece.Empty:
+            self.bitboards[status.value] |= bit
+        self.count_mobility()
+
+    def count_mobility(self):
+        """Count, from scratch, the empty neighbours of every fork and the mobility of each player:
+        the sum and product of the number of moves of their pieces and their pieces in the middle layer.
+        The product is stored as the number of pieces with no moves and the product of the nonzero factors,
+        so it can be updated without dividing by zero. The pieces with no moves are also kept as a mask.
+        """
+        topology = self.topology
+        empty = self.empty_mask()
+        self.empty_neighbours = [
+            (mask & empty).bit_count() for mask in topology.neighbour_masks]
+        # Indexed by piece value, like the bitboards
+        self.mobility_sums = [0, 0, 0]
+        self.mobility_zeros = [0, 0, 0]
+        self.mobility_products = [1, 1, 1]
+        self.middle_counts = [0, 0, 0]
+        self.trapped = 0
+        for side in (1, 2):
+            for i in iter_bits(self.bitboards[side]):
+                self.update_mobility(side, None, self.empty_neighbours[i])
+                if not self.empty_neighbours[i]:
+                    self.trapped |= 1 << i
+            self.middle_counts[side] = (
+                self.bitboards[side] & topology.middle_mask).bit_count()
+
+    def update_mobility(self, side: int, old: int | None, new: int | None):
+        """Replace the number of moves of one of a player's pieces in the player's mobility.
+
+        Args:
+            side (int): The value of the player's piece type.
+            old (int | None): The piece's previous number of moves, or None for a new piece.
+            new (int | None): The piece's new number of moves, or None for a removed piece.
+        """
+        if old is not None:
+            self.mobility_sums[side] -= old
+            if old:
+                self.mobility_products[side] //= old
+            else:
+                self.mobility_zeros[side] -= 1
+        if new is not None:
+            self.mobility_sums[side] += new
+            if new:
+                self.mobility_products[side] *= new
+            else:
+                self.mobility_zeros[side] += 1
+
+    def move_piece(self, piece: Piece, curr_index: int, move_index: int):
+        """Move a piece to an empty fork, updating the hash, the counters of the pieces around both forks
+        and the mask of trapped pieces, since only those pieces can be trapped or freed by the move.
+
+        Args:
+            piece (Piece): The piece type being moved.
+            curr_index (int): The index of the fork holding the piece.
+            move_index (int): The index of the empty fork to place the piece.
+        """
+        topology = self.topology
+        neighbours = topology.neighbours
+        counts = self.empty_neighbours
+        bitboards = self.bitboards
+        side = piece.value
+        moves_before = counts[curr_index]
+
+        # The piece leaves its fork, which becomes empty for its neighbours
+        for i in neighbours[curr_index]:
+            if bitboards[1] >> i & 1:
+                self.update_mobility(1, counts[i], counts[i] + 1)
+            elif bitboards[2] >> i & 1:
+                self.update_mobility(2, counts[i], counts[i] + 1)
+            counts[i] += 1
+        bitboards[side] ^= (1 << curr_index) | (1 << move_index)
+        # Its fork's neighbours now have an empty neighbour, and the fork no longer holds a piece
+        trapped = self.trapped & ~(
+            topology.neighbour_masks[curr_index] | 1 << curr_index)
+        # And takes the target fork, no longer empty for its neighbours
+        for i in neighbours[move_index]:
+            if bitboards[1] >> i & 1:
+                self.update_mobility(1, counts[i], counts[i] - 1)
+                if counts[i] == 1:
+                    trapped |= 1 << i
+            elif bitboards[2] >> i & 1:
+                self.update_mobility(2, counts[i], counts[i] - 1)
+                if counts[i] == 1:
+                    trapped |= 1 << i
+            counts[i] -= 1
+        self.update_mobility(side, moves_before, counts[move_index])
+        if not counts[move_index]:
+            trapped |= 1 << move_index
+        self.trapped = trapped
+
+        middle_mask = topology.middle_mask
+        self.middle_counts[side] += (
+            (middle_mask >> move_index & 1) - (middle_mask >> curr_index & 1))
+        piece_keys = topology.piece_keys[side]
+        self.zobrist ^= piece_keys[curr_index] ^ piece_keys[move_index]
+
+    def get_vertex(self, index: int) -> Fork:
+        """Get the fork corresponding to the given index.
+
+        Args:
+            index (int): The fork's index.
+
+        Raises:
+            KeyError: The index is not an integer.
+            KeyError: The index does not correspond to a fork in the board.
+
+        Returns:
+            Fork: A view of the fork with the specified index.
+        """
+        if type(index) != int:
+            raise KeyError("Vertex indices must be integers.")
+        if index not in range(self.topology.size):
+            raise KeyError("That vertex does not exist in the graph.")
+        return Fork(self, index)
+
+    def get_fork(self, index: int) -> Fork:
+        """Get the fork corresponding to the given index.
+
+        Args:
+            index (int): The fork's index.
+
+        Returns:
+            Fork: A view of a fork from the board, which is an instance of the Vertex class.
+        """
+        return self.get_vertex(index)
+
+    def get_siblings(self, index: int) -> list:
+        """Get the forks connected to the fork of the given index.
+
+        Args:
+            index (int): The index of the fork.
+
+        Returns:
+            list: A list of the forks connected to the specified fork.
+        """
+        self.get_vertex(index)
+        return [Fork(self, j) for j in self.topology.neighbours[index]]
+
+    # The topology is immutable, so copies share it and only duplicate the bitboards.
+    def __deepcopy__(self, memo):
+        board = Board.__new__(Board)
+        board.outer_length = self.outer_length
+        board.topology = self.topology
+        board.bitboards = self.bitboards[:]
+        board.zobrist = self.zobrist
+        board.empty_neighbours = self.empty_neighbours[:]
+        board.mobility_sums = self.mobility_sums[:]
+        board.mobility_zeros = self.mobility_zeros[:]
+        board.mobility_products = self.mobility_products[:]
+        board.middle_counts = self.middle_counts[:]
+        board.trapped = self.trapped
+        memo[id(self)] = board
+        return board
+
+    # Pickled boards (sent to worker processes) leave the topology and counters out and rebuild them when loaded.
+    def __getstate__(self):
+        return (self.outer_length, self.bitboards, self.zobrist)
+
+    def __setstate__(self, state):
+        self.outer_length, self.bitboards, self.zobrist = state
+        self.topology = get_topology(self.outer_length)
+        self.count_mobility()
+
+    def __eq__(self, board):
+        return (self.topology is board.topology
+                and self.zobrist == board.zobrist
+                and self.bitboards == board.bitboards)
+
+    def __repr__(self):
+        return str(self.paths)
+
+
+class State:
+    """Class representing a game state, which stores the board, the moving player and the winner (if one exists after the move)
+    """
+
+    def __init__(self, player: Player, board: Board = None):
+        """Initialize a new state with the given player and board.
+
+        Args:
+            player (Player): The player to execute a move.
+            board (Board, optional): The current board.
+            Defaults to None (a new empty Board of outer length 5, if it is an initial state).
+        """
+        if board is None:
+            board = Board(5)
+        self.board = board
+        self.player_piece = player.piece
+        self.winner = None
+
+    def get_player_piece_list(self, player_piece: Piece) -> list:
+        """Get the list of pieces from the state's player, given its piece type.
+
+        Args:
+            player_piece (Piece): The piece controller by the state's player.
+
+        Returns:
+            list: The list of indices of the state player's pieces.
+        """
+        return list(iter_bits(self.board.bitboards[player_piece.value]))
+
+    def get_opponent_piece(self) -> Piece:
+        """Get the opposite of the state player's piece, which represents the opponent's piece in a game.
+
+        Returns:
+            Piece: The piece with a value opposite to the player.
+        """
+        # 3 - 1 = 2 and 3 - 2 = 1, 1 and 2 are the values for the Red and Black pieces
+        return Piece(3 - self.player_piece.value)
+
+    def get_hash(self) -> int:
+        """Get the Zobrist hash of the state, which covers the board and the player to move.
+
+        Returns:
+            int: The state's hash.
+        """
+        return self.board.zobrist ^ self.board.topology.turn_keys[self.player_piece.value]
+
+    def is_trapping_move(self, curr_index: int, move_index: int) -> bool:
+        """Check if a move of the state player leaves one of the opponent's pieces with no moves.
+
+        Args:
+            curr_index (int): The index of the piece to be moved.
+            move_index (int): The index of the fork to place the piece.
+
+        Returns:
+            bool: True if the move traps an opponent's piece, False otherwise.
+        """
+        board = self.board
+        topology = board.topology
+        empty = (board.empty_mask() | (1 << curr_index)) & ~(1 << move_index)
+        # Only the pieces next to the target fork can lose their last empty neighbour
+        neighbours = (board.bitboards[3 - self.player_piece.value]
+                      & topology.neighbour_masks[move_index])
+        return trapped_mask(topology, neighbours, empty) != 0
+
+    def trapped_pieces(self) -> int:
+        """Get the mask of pieces (of both players) with no empty fork in their neighbourhood,
+        as kept up to date by the board after each move.
+
+        Returns:
+            int: The mask of trapped pieces.
+        """
+        return self.board.trapped
+
+    def update_winner(self):
+        """Update the winner in case a piece has no moves left.
+        """
+        winner = self.simulate_winner()
+        if winner:
+            self.winner = winner
+
+    def simulate_winner(self) -> Piece | None:
+        """Check and return a winner if it exists, without updating the state.
+
+        Returns:
+            Piece: The winning piece type.
+        """
+        trapped = self.board.trapped
+        if trapped:
+            # The lowest trapped fork decides the winner, as in a scan by fork index
+            if trapped & -trapped & self.board.bitboards[1]:
+                return Piece.Black
+            return Piece.Red
+
+    def move(self, curr_index: int, move_index: int, state_history: History):
+        """Execute a move, given the indices of the moving piece and the
+        target fork, as well as the state's history.
+
+        Args:
+            curr_index (int): The index of the piece to be moved.
+            move_index (int): The index of the fork to place the piece.
+            state_history (History): The game's state history.
+
+        Raises:
+            ValueError: The move is invalid.
+        """
+        if self.valid_move(
+                curr_index, move_index, self.player_piece, state_history):
+            self.board.move_piece(self.player_piece, curr_index, move_index)
+            self.player_piece = Piece(
+                3 - self.player_piece.value)  # Swap turns
+        else:
+            raise ValueError("Invalid move!")
+
+    def make_move(
+            self, curr_index: int, move_index: int,
+            state_history: History) -> tuple:
+        """Execute a move in place without validating it, and add the resulting position to the history.
+        Meant for searches, which only play moves given by available_moves.
+
+        Args:
+            curr_index (int): The index of the piece to be moved.
+            move_index (int): The index of the fork to place the piece.
+            state_history (History): The game's state history.
+
+        Returns:
+            tuple: The undo token to be passed to unmake_move.
+        """
+        undo = (curr_index, move_index, self.winner)
+        self.board.move_piece(self.player_piece, curr_index, move_index)
+        self.player_piece = Piece(3 - self.player_piece.value)
+        state_history.append(self.get_hash())
+        return undo
+
+    def unmake_move(self, undo: tuple, state_history: History):
+        """Revert a move executed by make_move, removing its position from the history.
+
+        Args:
+            undo (tuple): The undo token returned by make_move.
+            state_history (History): The game's state history.
+        """
+        curr_index, move_index, winner = undo
+        state_history.pop()
+        self.player_piece = Piece(3 - self.player_piece.value)
+        self.board.move_piece(self.player_piece, move_index, curr_index)
+        self.winner = winner
+
+    def valid_move(
+            self, curr_index: int, move_index: int, player_piece: Piece,
+            state_history: History) -> bool:
+        """Check if a move is valid or not.
+
+        Args:
+            curr_index (int): The index of the piece to be moved.
+            move_index (int): The index of the fork to place the piece.
+            player_piece (Piece): The state player's piece.
+            state_history (History): The game's state history.
+
+        Returns:
+            bool: True if the move is valid, False otherwise.
+        """
+        board = self.board
+        board.get_vertex(curr_index)
+        board.get_vertex(move_index)
+
+        """
+        A move is valid if:
+            - curr_fork points to a non-empty fork (a piece)
+            - The piece belongs to the state player
+            - The target fork is in the piece's neighbourhood
+            - The target fork is empty
+            - It does not restart a previously closed movement loop, up to a certain length
+            More info on stalemates present on the game's rulebook.
+        """
+        if (board.topology.neighbour_masks[curr_index] >> move_index & 1
+                and board.bitboards[player_piece.value] >> curr_index & 1
+                and board.empty_mask() >> move_index & 1):
+            topology = board.topology
+            piece_keys = topology.piece_keys[player_piece.value]
+            position_hash = board.zobrist ^ topology.turn_keys[player_piece.value]
+            next_hash = (board.zobrist ^ piece_keys[curr_index]
+                         ^ piece_keys[move_index]
+                         ^ topology.turn_keys[3 - player_piece.value])
+            return not state_history.restarts_loop(position_hash, next_hash)
+        else:
+            return False
+
+    def forbidden_move(
+            self, player_piece: Piece, state_history: History) -> tuple | None:
+        """Get the move of a given player that would restart a previously closed movement loop.
+        There is at most one: the one leading to the position that followed the previous occurrence of this one.
+
+        Args:
+            player_piece (Piece): The player's piece type.
+            state_history (History): The game's state history.
+
+        Returns:
+            tuple | None: The move, in the format (chosen_piece_idx, target_fork_idx), or None if there is none.
+        """
+        board = self.board
+        topology = board.topology
+        side = player_piece.value
+        forbidden = state_history.forbidden_next(
+            board.zobrist ^ topology.turn_keys[side])
+        if forbidden is None:
+            return None
+        # Hash of the position after a move from fork i to fork j, once keys[i] ^ keys[j] is applied
+        base = board.zobrist ^ topology.turn_keys[3 - side]
+        keys = topology.piece_keys[side]
+        empty = board.empty_mask()
+        for i in iter_bits(board.bitboards[side]):
+            for j in iter_bits(topology.neighbour_masks[i] & empty):
+                if base ^ keys[i] ^ keys[j] == forbidden:
+                    return i, j
+        return None
+
+    def iter_moves(self, player_piece: Piece, state_history: History):
+        """Generate the available moves a given player can execute, one at a time.
+        The state may be changed between moves, as long as it is restored before the next one is drawn.
+
+        Args:
+            player_piece (Piece): The player's piece type.
+            state_history (History): The game's state history.
+
+        Yields:
+            tuple: The moves, in the format (chosen_piece_idx, target_fork_idx), by piece then target fork order.
+        """
+        forbidden = self.forbidden_move(player_piece, state_history)
+        neighbours = self.board.topology.neighbours
+        empty = self.board.empty_mask()
+        for i in iter_bits(self.board.bitboards[player_piece.value]):
+            for j in neighbours[i]:
+                if empty >> j & 1 and (i, j) != forbidden:
+                    yield i, j
+
+    def available_moves(
+            self, player_piece: Piece, state_history: History) -> list:
+        """Get the available moves a given player can execute.
+
+        Args:
+            player_piece (Piece): The player's piece type.
+            state_history (History): The game's state history.
+
+        Returns:
+            list: List of moves, composed of tuples in the format (chosen_piece_idx, target_fork_idx).
+        """
+        return list(self.iter_moves(player_piece, state_history))
+
+    def winning_moves(self, player_piece: Piece, state_history: History):
+        """Generate the available moves that win the game right away for a given player,
+        by trapping an opponent's piece (see simulate_winner). Only a move to the last empty neighbour
+        of an opponent's piece can trap it, so only those moves are checked.
+
+        Args:
+            player_piece (Piece): The player's piece type.
+            state_history (History): The game's state history.
+
+        Yields:
+            tuple: The winning moves, in the format (chosen_piece_idx, target_fork_idx).
+        """
+        board = self.board
+        if board.trapped:
+            return
+        topology = board.topology
+        neighbour_masks = topology.neighbour_masks
+        counts = board.empty_neighbours
+        own = board.bitboards[player_piece.value]
+        opponent = board.bitboards[3 - player_piece.value]
+        empty = board.empty_mask()
+        targets = 0
+        for i in iter_bits(opponent):
+            if counts[i] == 1:
+                targets |= neighbour_masks[i] & empty
+        if not targets:
+            return
+        forbidden = self.forbidden_move(player_piece, state_history)
+        for j in iter_bits(targets):
+            for i in iter_bits(neighbour_masks[j] & own):
+                if (i, j) == forbidden:
+                    continue
+                # Only the pieces next to the target fork can be trapped, the moved piece can go back
+                trapped = trapped_mask(
+                    topology, (own ^ 1 << i | opponent) & neighbour_masks[j],
+                    (empty | 1 << i) & ~(1 << j))
+                # The lowest trapped fork decides the winner
+                if trapped & -trapped & opponent:
+                    yield i, j
+
+    def winning_move(
+            self, player_piece: Piece, state_history: History) -> tuple | None:
+        """Find an available move that wins the game right away for a given player.
+
+        Args:
+            player_piece (Piece): The player's piece type.
+            state_history (History): The game's state history.
+
+        Returns:
+            tuple | None: The first move given by winning_moves, or None if there is none.
+        """
+        return next(self.winning_moves(player_piece, state_history), None)
+
+    def generate_moves(
+            self, player_piece: Piece, state_history: History,
+            order: Callable = None):
+        """Generate the available moves a given player can execute in stages: the moves that win right away first,
+        then the others. Moves are only looked for when drawn, so a caller stopping at a winning move
+        skips the rest. The state must be restored before the next move is drawn.
+
+        Args:
+            player_piece (Piece): The player's piece type.
+            state_history (History): The game's state history.
+            order (Callable, optional): A function sorting the list of the other moves.
+            Defaults to None (they follow the order of iter_moves).
+
+        Yields:
+            tuple: The moves, in the format (chosen_piece_idx, target_fork_idx).
+        """
+        winning = []
+        for move in self.winning_moves(player_piece, state_history):
+            winning.append(move)
+            yield move
+        moves = [move for move in self.iter_moves(player_piece, state_history)
+                 if move not in winning]
+        if order is not None:
+            moves = order(moves)
+        yield from moves
+
+    def count_moves(self, player_piece: Piece, state_history: History) -> int:
+        """Count the number of moves available to a given player, without listing them.
+
+        Args:
+            player_piece (Piece): The player's piece type.
+            state_history (History): The game's state history.
+
+        Returns:
+            int: The number of available moves.
+        """
+        # Every empty neighbour of one of the player's pieces is a move, except at most one restarting a loop
+        count = self.board.mobility_sums[player_piece.value]
+        if count and self.forbidden_move(player_piece, state_history) is not None:
+            count -= 1
+        return count
+
+    def has_legal_move(self, player_piece: Piece, state_history: History) -> bool:
+        """Check if a given player has any available move.
+
+        Args:
+            player_piece (Piece): The player's piece type.
+            state_history (History): The game's state history.
+
+        Returns:
+            bool: True if the player can move, False otherwise.
+        """
+        count = self.board.mobility_sums[player_piece.value]
+        # A single move can be forbidden, so the history only matters with one move left
+        if count != 1:
+            return count > 1
+        return self.forbidden_move(player_piece, state_history) is None
+
+    def count_middle_pieces(self, player_piece: Piece) -> int:
+        """Count the amount of pieces from a given player in the middle layer of the board.
+
+        Args:
+            player_piece (Piece): The player's piece type.
+
+        Returns:
+            int: The number of pieces in the middle layer.
+        """
+        return self.board.middle_counts[player_piece.value]
+
+    def list_moves(self, player_piece: Piece) -> list:
+        """List the number of moves available for each piece, given a player.
+
+        Args:
+            player_piece (Piece): The player's piece type.
+
+        Returns:
+            list: A list of the number of possible moves for each player piece.
+        """
+        counts = self.board.empty_neighbours
+        return [counts[i]
+                for i in iter_bits(self.board.bitboards[player_piece.value])]
+
+    def mobility_product(self, player_piece: Piece) -> int:
+        """Get the product of the number of moves available for each piece, given a player.
+
+        Args:
+            player_piece (Piece): The player's piece type.
+
+        Returns:
+            int: The product of the values given by list_moves.
+        """
+        if self.board.mobility_zeros[player_piece.value]:
+            return 0
+        return self.board.mobility_products[player_piece.value]
+
+    def mobility_sum(self, player_piece: Piece) -> int:
+        """Get the sum of the number of moves available for each piece, given a player.
+
+        Args:
+            player_piece (Piece): The player's piece type.
+
+        Returns:
+            int: The sum of the values given by list_moves.
+        """
+        return self.board.mobility_sums[player_piece.value]
+
+    def is_final(self) -> bool:
+        """Check if a state is final or not.
+
+        Returns:
+            bool: True if the state is final, False otherwise.
+        """
+        return self.board.trapped != 0
+
+    # Two states are considered equal if the board is the same.
+    def __eq__(self, state):
+        return self.board == state.board
+
+    def __repr__(self):
+        return self.board.__repr__()
+
+
+def minimax(
+        state: State, depth: int, maximizing: bool, alpha: int, beta: int,
+        state_history: History, evaluate_func: Callable, caller: Piece,
+        table: TranspositionTable = None, deadline: float = None,
+        orderer: MoveOrderer = None, ply: int = 0) -> int | float:
+    """The minimax algorithm. Select the best possible move considering
+    the caller and his opponent's choices (depending on the depth).
+
+    Args:
+        state (State): The game state. Moves are made and unmade on it in place,
+        so it is left unchanged when the search returns (but not when it times out).
+        depth (int): The algorithm's depth.
+        maximizing (bool): If the current depth stores the maximum value (True) or not (False).
+        alpha (int): The lower value bound to consider.
+        beta (int): The upper value bound to consider.
+        state_history (History): The game's state history, also restored when the search returns.
+        evaluate_func (Callable): The function that will evaluate the board.
+        caller (Piece): The piece type of the player who called the first iteration of minimax.
+        table (TranspositionTable, optional): The table storing the results of searched positions.
+        Defaults to None (no table is used).
+        deadline (float, optional): The time.perf_counter() value at which the search is aborted.
+        Defaults to None (no deadline).
+        orderer (MoveOrderer, optional): The move ordering heuristics, which also count the visited nodes.
+        Defaults to None (only the table's best move is searched first).
+        ply (int, optional): The distance from the search's root. Defaults to 0.
+
+    Raises:
+        SearchTimeout: The deadline passed before the search was completed.
+
+    Returns:
+        int | float: The evaluation result as an integer, except if the result is infinity
+        (which is considered a float)
+    """
+    if orderer is not None:
+        orderer.count_node()
+    if deadline is not None and time.perf_counter() > deadline:
+        raise SearchTimeout()
+    if depth == 0 or state.is_final():
+        return evaluate_func(state, caller)
+    pv_move = None
+    if table is not None:
+        key = state.get_hash()
+        entry = table.probe(key)
+        if entry is not None:
+            if table.is_usable(entry, depth):
+                if entry.node_type == NodeType.Exact:
+                    return entry.score
+                if entry.node_type == NodeType.Lower:
+                    alpha = max(alpha, entry.score)
+                else:
+                    beta = min(beta, entry.score)
+                if beta <= alpha:
+                    return entry.score
+            pv_move = entry.best_move
+        window = (alpha, beta)
+
+    def order(moves: list) -> list:
+        if orderer is not None:
+            return orderer.order(state, moves, ply, pv_move)
+        if pv_move in moves:
+            # Search the stored best move first, if it is still available
+            moves.remove(pv_move)
+            moves.insert(0, pv_move)
+        return moves
+
+    # Moves are only generated once the table could not settle the position. Moves winning right away
+    # come first, and score the best possible value, so the other moves are cut off without being generated
+    moves = state.generate_moves(state.player_piece, state_history, order)
+
+    best_move = None
+    if maximizing:
+        best_eval = -math.inf
+        for move in moves:
+            undo = state.make_move(move[0], move[1], state_history)
+            evaluation = minimax(
+                state, depth - 1, False, alpha, beta, state_history,
+                evaluate_func, caller, table, deadline, orderer, ply + 1)
+            state.unmake_move(undo, state_history)
+            if best_move is None or evaluation > best_eval:
+                best_eval, best_move = evaluation, move
+            alpha = max(alpha, evaluation)
+            if beta <= alpha:
+                if orderer is not None:
+                    orderer.record_cutoff(move, ply, depth)
+                break
+    else:
+        best_eval = math.inf
+        for move in moves:
+            undo = state.make_move(move[0], move[1], state_history)
+            evaluation = minimax(
+                state, depth - 1, True, alpha, beta, state_history,
+                evaluate_func, caller, table, deadline, orderer, ply + 1)
+            state.unmake_move(undo, state_history)
+            if best_move is None or evaluation < best_eval:
+                best_eval, best_move = evaluation, move
+            beta = min(beta, evaluation)
+            if beta <= alpha:
+                if orderer is not None:
+                    orderer.record_cutoff(move, ply, depth)
+                break
+
+    if table is not None:
+        if best_eval <= window[0]:
+            node_type = NodeType.Upper
+        elif best_eval >= window[1]:
+            node_type = NodeType.Lower
+        else:
+            node_type = NodeType.Exact
+        table.store(key, depth, best_eval, node_type, best_move)
+    return best_eval
+
+
+def search_move(
+        state: State, state_history: History, move: tuple, depth: int,
+        alpha: int | float, evaluate_func: Callable, caller: Piece,
+        table: TranspositionTable = None, deadline: float = None,
+        orderer: MoveOrderer = None) -> int | float:
+    """Evaluate a move of the caller with minimax. The result is exact if it is higher than alpha,
+    otherwise it is an upper bound of the move's value.
+
+    Args:
+        state (State): The game state, in which the caller is the player to move.
+        state_history (History): The game's state history.
+        move (tuple): The move, in the format (chosen_piece_idx, target_fork_idx).
+        depth (int): The algorithm's depth, excluding the move.
+        alpha (int | float): The lower value bound to consider.
+        evaluate_func (Callable): The function that will evaluate the board.
+        caller (Piece): The piece type of the player making the move.
+        table (TranspositionTable, optional): The table storing the results of searched positions.
+        Defaults to None.
+        deadline (float, optional): The time.perf_counter() value at which the search is aborted.
+        Defaults to None (no deadline).
+        orderer (MoveOrderer, optional): The move ordering heuristics. Defaults to None.
+
+    Returns:
+        int | float: The evaluation result.
+    """
+    undo = state.make_move(move[0], move[1], state_history)
+    value = minimax(
+        state, depth, False, alpha, math.inf, state_history, evaluate_func,
+        caller, table, deadline, orderer, 1)
+    state.unmake_move(undo, state_history)
+    return value
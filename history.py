@@ -0,0 +1,177 @@
+class History:
+    """Class representing a game's position history, stored as a ring buffer of position hashes
+    along with an index of the positions in which each hash occurs.
+    Positions are numbered from the start of the game (absolute positions), so dropping the oldest ones
+    does not renumber the others. The buffer grows when full, so searches can push past the kept length.
+    """
+
+    def __init__(self, hashes: list = None, max_length: int = None, capacity: int = 32):
+        """Initialize a new history, given an optional list of position hashes.
+
+        Args:
+            hashes (list, optional): The position hashes, from oldest to newest. Defaults to None (empty history).
+            max_length (int, optional): The number of positions kept by trim. Defaults to None (no limit).
+            capacity (int, optional): The initial size of the buffer, rounded up to a power of 2. Defaults to 32.
+        """
+        capacity = 1 << max(capacity - 1, 1).bit_length()
+        self.buffer = [0] * capacity
+        # The hash of absolute position p is stored in buffer[p & mask]
+        self.mask = capacity - 1
+        # Absolute position of the oldest position kept, increased every time it is dropped
+        self.offset = 0
+        self.length = 0
+        self.max_length = max_length
+        self.occurrences = {}
+        for position_hash in hashes or []:
+            self.append(position_hash)
+
+    def append(self, position_hash: int):
+        """Add a new position to the end of the history.
+
+        Args:
+            position_hash (int): The hash of the position.
+        """
+        if self.length > self.mask:
+            self._grow()
+        position = self.offset + self.length
+        self.buffer[position & self.mask] = position_hash
+        self.length += 1
+        indices = self.occurrences.get(position_hash)
+        if indices is None:
+            self.occurrences[position_hash] = [position]
+        else:
+            indices.append(position)
+
+    def pop(self) -> int:
+        """Remove the newest position from the history.
+
+        Returns:
+            int: The hash of the removed position.
+        """
+        self.length -= 1
+        position_hash = self.buffer[(self.offset + self.length) & self.mask]
+        indices = self.occurrences[position_hash]
+        indices.pop()
+        if not indices:
+            del self.occurrences[position_hash]
+        return position_hash
+
+    def popleft(self) -> int:
+        """Remove the oldest position from the history.
+
+        Returns:
+            int: The hash of the removed position.
+        """
+        position_hash = self.buffer[self.offset & self.mask]
+        self.offset += 1
+        self.length -= 1
+        indices = self.occurrences[position_hash]
+        # The oldest position is the first occurrence of its hash
+        del indices[0]
+        if not indices:
+            del self.occurrences[position_hash]
+        return position_hash
+
+    def trim(self):
+        """Drop the oldest positions until the history is down to its maximum length.
+        """
+        if self.max_length is not None:
+            while self.length > self.max_length:
+                self.popleft()
+
+    def _grow(self):
+        """Double the size of the buffer, keeping every position at its absolute position.
+        """
+        capacity = (self.mask + 1) * 2
+        buffer = [0] * capacity
+        for position in range(self.offset, self.offset + self.length):
+            buffer[position & (capacity - 1)] = self.buffer[position & self.mask]
+        self.buffer = buffer
+        self.mask = capacity - 1
+
+    def last_occurrence(self, position_hash: int, before: int) -> int | None:
+        """Get the absolute position of the newest occurrence of a hash before a given absolute position.
+
+        Args:
+            position_hash (int): The hash of the position.
+            before (int): The absolute position to search before.
+
+        Returns:
+            int | None: The absolute position of the occurrence, or None if there is none.
+        """
+        indices = self.occurrences.get(position_hash)
+        if indices:
+            for i in reversed(indices):
+                if i < before:
+                    return i
+        return None
+
+    def forbidden_next(self, position_hash: int) -> int | None:
+        """Get the position that cannot follow a given one without restarting a previously closed movement loop:
+        the one that directly followed the newest past occurrence of the position (ignoring the newest entry
+        of the history), if that occurrence of it is also its newest.
+
+        Args:
+            position_hash (int): The hash of the current position.
+
+        Returns:
+            int | None: The hash of the forbidden next position, or None if every move is allowed.
+        """
+        end = self.offset + self.length - 1
+        previous = self.last_occurrence(position_hash, end)
+        if previous is None:
+            return None
+        next_hash = self.buffer[(previous + 1) & self.mask]
+        if self.last_occurrence(next_hash, end) == previous + 1:
+            return next_hash
+        return None
+
+    def restarts_loop(self, position_hash: int, next_hash: int) -> bool:
+        """Check if moving from a position to another would restart a previously closed movement loop
+        (see forbidden_next).
+
+        Args:
+            position_hash (int): The hash of the current position.
+            next_hash (int): The hash of the position after the move.
+
+        Returns:
+            bool: True if the move restarts a loop, False otherwise.
+        """
+        return self.forbidden_next(position_hash) == next_hash
+
+    def copy(self):
+        """Create a copy of the history.
+
+        Returns:
+            History: The copied history.
+        """
+        history = History.__new__(History)
+        history.buffer = self.buffer[:]
+        history.mask = self.mask
+        history.offset = self.offset
+        history.length = self.length
+        history.max_length = self.max_length
+        history.occurrences = {
+            position_hash: indices[:]
+            for position_hash, indices in self.occurrences.items()}
+        return history
+
+    def __deepcopy__(self, memo):
+        return self.copy()
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, index: int) -> int:
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError("History index out of range")
+        return self.buffer[(self.offset + index) & self.mask]
+
+    def __iter__(self):
+        for position in range(self.offset, self.offset + self.length):
+            yield self.buffer[position & self.mask]
+
+    def __repr__(self):
+        return f"History({list(self)})"
@@ -1,29 +1,33 @@
 import random
 import math
+import time
 from copy import deepcopy
+from rollout import Rollout
 
 
 class MCTS_node:
-    """A node of the Tree Structure of MCTS
+    """A node of the Tree Structure of MCTS. Nodes only store the move that originated them,
+    their position is rebuilt by replaying the moves from the root
     """
 
-    def __init__(self, state, move, parent):
-        """Initialize a MCTS node with its state, the move that originated it and its parent node
+    __slots__ = ("move", "parent", "untried_moves",
+                 "visits", "value", "children")
+
+    def __init__(self, move, parent, untried_moves):
+        """Initialize a MCTS node with the move that originated it, its parent node and its moves
 
         Args:
-            state (State): The node's state
             move (tuple): The move that originated it
             parent (MCTS_node): The parent node
+            untried_moves (list): The moves available in the node's position (none if it is final),
+            which are expanded from the end of the list
         """
-        self.state = state
         self.move = move
         self.parent = parent
-        self.max_children = state[0].count_moves(
-            state[0].player_piece, state[1])
+        self.untried_moves = untried_moves
 
         self.visits = 0
         self.value = 0
-        self.ucb = 0
         self.children = []
 
     def update_value(self, nvalue):
@@ -34,24 +38,28 @@ class MCTS_node:
         """
         self.value += nvalue
 
-    def update_visits(self):
+    def update_visits(self, count=1):
         """
-        Add a visit to the node
+        Add visits to the node
+
+        Args:
+            count (int, optional): The number of visits to add. Defaults to 1.
         """
-        self.visits += 1
+        self.visits += count
 
-    def update_ucb(self, c=2):
-        """Update the Upper Confidence Bound value
+    def ucb(self, c, sign, log_parent_visits):
+        """Get the Upper Confidence Bound (UCB1) value of a visited node
 
         Args:
-            c (int, optional): The confidence constant value. Defaults to 2.
-        """
-        if self.parent is None:
-            p_visits = 0
-        else:
-            p_visits = self.parent.visits
+            c (float): The exploration constant value.
+            sign (int): 1 if the player choosing this node is the one that called MCTS, -1 otherwise.
+            log_parent_visits (float): The natural logarithm of the parent's visits.
 
-        self.ucb = self.value + c * math.sqrt(p_visits/self.visits)
+        Returns:
+            float: The node's mean value, seen by the player choosing it, plus its exploration bonus
+        """
+        return (sign * self.value / self.visits
+                + c * math.sqrt(log_parent_visits / self.visits))
 
     def add_child(self, child):
         """Add a children to the node
@@ -64,68 +72,126 @@ class MCTS_node:
 
 class MCTS:
     """Class representing the MCTS algorithm.
+    The tree's positions are not stored: each iteration plays the moves of the selected path
+    on a single copy of the root state, and takes them back while back propagating.
     """
 
-    def __init__(self, root: MCTS_node, player):
+    def __init__(
+            self, state, state_history, player,
+            exploration: float = math.sqrt(2), max_nodes: int = 1 << 16):
         """Initialize a new instance of the MCTS algorithm.
 
         Args:
-            root (MCTS_node): The starting point of the algorithm.
+            state (State): The starting point of the algorithm.
+            state_history (History): The starting state's history.
             player (Piece): The player that is calling MCTS (the one using it as its method of move decidal)
+            exploration (float, optional): The UCB1 exploration constant. Defaults to sqrt(2).
+            max_nodes (int, optional): The maximum number of nodes in the tree, after which
+            the least visited subtrees are recycled. Defaults to 65536.
         """
-        self.root = root
+        self.state = deepcopy(state)
+        self.state_history = state_history.copy()
         self.player = player
-        self.leaves = [root]
+        self.exploration = exploration
+        self.max_nodes = max_nodes
+        self.root = MCTS_node(None, None, self.get_untried_moves())
+        self.node_count = 1
+        # Undo tokens of the moves played on self.state in the current iteration
+        self.undo = []
+        self.rollout = Rollout(state.board.outer_length)
+        self.winning_move = self.find_winning_move()
+
+    def search(self, iteration_total=None, deadline=None):
+        """Run iterations until the budget runs out, or stop early if a root move wins the game right away
+        or the most visited root move can no longer be overtaken
 
-    def select(self):
-        """Select the leaf to be expanded based on its UCB
+        Args:
+            iteration_total (int, optional): The maximum number of iterations. Defaults to None (no maximum).
+            deadline (float, optional): The time (as given by time.perf_counter) at which the search stops.
+            Defaults to None (no deadline). At least one of the limits must be given.
 
         Returns:
-            MCTS_node: The selected node
+            int: The number of iterations run
         """
-        map(lambda x: x.update_ucb(), self.leaves)
-        filter(lambda x: check_children(x), self.leaves)
+        if self.winning_move is not None:
+            return 0
+        start = time.perf_counter()
+        iterations = 0
+        # At least one root move must be expanded to choose from
+        while self.root.children or self.root.untried_moves:
+            remaining = remaining_iterations(
+                iterations, iteration_total, start, deadline)
+            if self.root.children and (
+                    remaining <= 0 or self.decided(remaining)):
+                break
+            self.iterate()
+            iterations += 1
+        return iterations
+
+    def decided(self, remaining_visits):
+        """Check if the most visited root move can no longer be overtaken
 
-        self.leaves.sort(key=lambda x: x.ucb, reverse=True)
-        return self.leaves[0]
+        Args:
+            remaining_visits (float): The most visits the root moves can still get
 
-    def check_children(self, node):
-        """Checks if found all children
+        Returns:
+            boolean: True if the most visited root move leads every other by more than the remaining visits
+        """
+        visits = sorted(
+            (child.visits for child in self.root.children), reverse=True)
+        if self.root.untried_moves:
+            visits.append(0)
+        return len(visits) == 1 or visits[0] - visits[1] > remaining_visits
+
+    def iterate(self):
+        """Run one iteration of the algorithm
+        """
+        # Select
+        node = self.select()
+        # Expand
+        leaf = self.expand(node)
+        # Simulate
+        result = self.simulate(leaf)
+        # Back Propagate
+        self.back_propagate(leaf, result)
 
-        Args:
-            node (MCTS_node): The node to be checked
+    def select(self):
+        """Select the node to be expanded, descending from the root through the child with the best UCB
+        until a node with untried moves (or a final node) is reached
 
         Returns:
-            boolean: True if 
+            MCTS_node: The selected node
         """
-        if len(node.children) != node.max_children:
-            return True
+        if self.node_count >= self.max_nodes:
+            self.recycle()
+        node = self.root
+        while not node.untried_moves and node.children:
+            sign = 1 if self.state.player_piece == self.player else -1
+            log_visits = math.log(node.visits)
+            node = max(
+                node.children,
+                key=lambda x: x.ucb(self.exploration, sign, log_visits))
+            self.play(node.move)
+        return node
 
     def expand(self, node):
-        """Expand a node to one of its children
+        """Expand a node with one of its untried moves
 
         Args:
             node (MCTS_node): Node to be expanded
 
         Returns:
-            MCTS_node: The expanded child
+            MCTS_node: The expanded child, or the node itself if it is final
         """
-
-        moves = node.state[0].available_moves(
-            node.state[0].player_piece, node.state[1])
-        rand = random.randint(0, len(moves)-1)
-        child = self.generate_node(moves[rand], node)
+        if not node.untried_moves:
+            return node
+        child = self.generate_node(node.untried_moves.pop(), node)
         node.add_child(child)
-
-        self.leaves.append(child)
-
-        if len(node.children) == node.max_children:
-            self.leaves.remove(node)
-
         return child
 
     def simulate(self, node):
-        """Simulates a game from a node until it reaches an end state
+        """Simulates a game from the node reached by the current iteration until it reaches an end state,
+        with random playouts that do not create nodes nor copy the position
 
         Args:
             node (MCTS_node): The node from which the simulation will begin
@@ -133,44 +199,169 @@ class MCTS:
         Returns:
             integer: Returns 1 if self.player won, -1 otherwise
         """
-        end = False
-        while not end:
-            moves = node.state[0].available_moves(
-                node.state[0].player_piece, node.state[1])
-            rand = random.randint(0, len(moves)-1)
-            node = self.generate_node(moves[rand], node)
-            end = node.state[0].is_final()
-
-        if node.state[0].simulate_winner() == self.player:
+        if self.rollout.play(self.state, self.state_history) == self.player:
             return 1
         else:
             return -1
 
-    def back_propagate(self, node, result):
-        """Back propagates result from node to its parent, until the root is reached, updating the nodes' values
+    def back_propagate(self, node, result, visits=1):
+        """Back propagates result from node to its parents, until the root is reached (included), updating the nodes' values
+        and taking back the moves played in the iteration
 
         Args:
-            node (MCTS_node): The node to be updated, and the child of the following node
+            node (MCTS_node): The first node to be updated
             result (integer): The value to be updated
+            visits (integer, optional): The number of simulations the result adds up. Defaults to 1.
+        """
+        while node is not None:
+            node.update_value(result)
+            node.update_visits(visits)
+            node = node.parent
+        self.take_back()
+
+    def take_back(self):
+        """Take back the moves played on the search's state in the current iteration
+        """
+        while self.undo:
+            self.state.unmake_move(self.undo.pop(), self.state_history)
+
+    def virtual_loss(self, node, sign=1):
+        """Add (or remove) a virtual loss on the path from the root to a node,
+        counted against the player choosing each node, so that the following selections of a batch explore other paths
+
+        Args:
+            node (MCTS_node): The node reached by the current iteration
+            sign (integer, optional): 1 to add the loss, -1 to remove it. Defaults to 1.
         """
+        # The root's player chooses the nodes at odd depths, and the opponent those at even depths
+        depth = 0
+        parent = node.parent
+        while parent is not None:
+            depth += 1
+            parent = parent.parent
+        chosen_by_player = depth % 2 == 1
+        while node is not None:
+            node.update_value(-sign if chosen_by_player else sign)
+            node.update_visits(sign)
+            chosen_by_player = not chosen_by_player
+            node = node.parent
+
+    def reroot(self, state, state_history) -> bool:
+        """Move the root of the tree down to the grandchild matching a given position,
+        reached after the root player's move and the opponent's reply.
+        The grandchild keeps the visits and values of its subtree, the rest of the tree is dropped.
 
-        if node.parent == None:
-            return
-        node.update_value(result)
-        node.update_visits()
-        self.back_propagate(node.parent, result)
+        Args:
+            state (State): The current game state.
+            state_history (History): The current game state history.
+
+        Returns:
+            boolean: True if the position was found in the tree, False otherwise
+        """
+        root = None
+        for child in self.root.children:
+            self.play(child.move)
+            for grandchild in child.children:
+                self.play(grandchild.move)
+                if self.state == state:
+                    root = grandchild
+                self.state.unmake_move(self.undo.pop(), self.state_history)
+            self.state.unmake_move(self.undo.pop(), self.state_history)
+        if root is None:
+            return False
+
+        # The game's history may differ from the one in the tree, so moves it now forbids are dropped
+        self.state = deepcopy(state)
+        self.state_history = state_history.copy()
+        root.move = None
+        root.parent = None
+        moves = self.get_untried_moves()
+        root.children = [
+            child for child in root.children if child.move in moves]
+        expanded = [child.move for child in root.children]
+        root.untried_moves = [move for move in moves if move not in expanded]
+        # Pruned children no longer count towards the root's statistics
+        root.visits = sum(child.visits for child in root.children)
+        root.value = sum(child.value for child in root.children)
+        self.root = root
+        self.node_count = len(self.get_nodes())
+        self.winning_move = self.find_winning_move()
+        return True
+
+    def recycle(self):
+        """Free space in the tree by removing its least visited subtrees, until it is down to three quarters
+        of the node budget. The moves of the removed nodes become untried again, to be expanded
+        after the parent's other untried moves.
+        """
+        # Descendants have at most their ancestors' visits and are deeper, so they are removed first
+        # and every node removed is a leaf
+        nodes = sorted(self.get_nodes()[1:], key=lambda x: (x[0].visits, -x[1]))
+        for node, _ in nodes:
+            if self.node_count <= self.max_nodes * 3 // 4:
+                break
+            node.parent.children.remove(node)
+            node.parent.untried_moves.insert(0, node.move)
+            self.node_count -= 1
+
+    def get_nodes(self) -> list:
+        """Get every node of the tree.
+
+        Returns:
+            list: Tuples with each node and its depth, starting with the root.
+        """
+        nodes = []
+        pending = [(self.root, 0)]
+        while pending:
+            node, depth = pending.pop()
+            nodes.append((node, depth))
+            pending.extend((child, depth + 1) for child in node.children)
+        return nodes
 
     def best_choice(self):
         """Finds the best choice from the root's children
 
         Returns:
-            MCTS_node: The best child (highest value)
+            MCTS_node: The most visited child (ties broken by the highest value)
+        """
+        return max(self.root.children, key=lambda x: (x.visits, x.value))
+
+    def find_winning_move(self):
+        """Find a root move that ends the game with the win of the player that called MCTS
+
+        Returns:
+            tuple: The winning move, or None if there is none
         """
-        self.root.children.sort(key=lambda x: x.value, reverse=True)
-        return self.root.children[0]
+        return self.state.winning_move(self.player, self.state_history)
+
+    def play(self, move):
+        """Play a move of the current iteration on the search's state
+
+        Args:
+            move (tuple): The move to be played
+        """
+        self.undo.append(
+            self.state.make_move(move[0], move[1], self.state_history))
+
+    def get_untried_moves(self) -> list:
+        """Get the moves available in the search's current state, in random order.
+        A move winning right away is the only one kept, since the player to move would not choose another
+
+        Returns:
+            list: The available moves, or an empty list if the state is final
+        """
+        if self.state.is_final():
+            return []
+        winning_move = self.state.winning_move(
+            self.state.player_piece, self.state_history)
+        if winning_move is not None:
+            return [winning_move]
+        moves = self.state.available_moves(
+            self.state.player_piece, self.state_history)
+        random.shuffle(moves)
+        return moves
 
     def generate_node(self, move, parent):
-        """Creates an MCTS_node
+        """Creates an MCTS_node, playing its move on the search's state
 
         Args:
             move (tuple): The move that originated this node
@@ -179,10 +370,33 @@ class MCTS:
         Returns:
             MCTS_node: The created MCTS_node
         """
+        self.play(move)
+        self.node_count += 1
+        return MCTS_node(move, parent, self.get_untried_moves())
 
-        state_copy = deepcopy(parent.state[0])
-        history_copy = deepcopy(parent.state[1])
-        state_copy.move(move[0], move[1], history_copy)
-        history_copy.append(state_copy)
 
-        return MCTS_node((state_copy, history_copy), move, parent)
+def remaining_iterations(
+        iterations, iteration_total=None, start=None, deadline=None):
+    """Estimate how many more iterations a search can run within its budget
+
+    Args:
+        iterations (int): The iterations run so far
+        iteration_total (int, optional): The maximum number of iterations. Defaults to None (no maximum).
+        start (float, optional): The time (as given by time.perf_counter) at which the search started.
+        Only needed with a deadline. Defaults to None.
+        deadline (float, optional): The time at which the search stops. Defaults to None (no deadline).
+
+    Returns:
+        float: The remaining iterations, estimated from the speed of the previous ones if there is a deadline
+    """
+    remaining = math.inf
+    if iteration_total is not None:
+        remaining = iteration_total - iterations
+    if deadline is not None:
+        now = time.perf_counter()
+        if now >= deadline:
+            return 0
+        if iterations:
+            remaining = min(
+                remaining, iterations * (deadline - now) / (now - start))
+    return remaining
@@ -0,0 +1,112 @@
+class MoveOrderer:
+    """Class representing the move ordering heuristics used by minimax, which store the killer moves
+    found at each ply and a history table rating moves by the cutoffs they caused.
+    Also counts the nodes visited by the searches using it.
+    """
+
+    def __init__(self, enabled: bool = True, killer_slots: int = 2):
+        """Initialize the heuristics with no recorded moves.
+
+        Args:
+            enabled (bool, optional): If moves are reordered (True) or only nodes are counted (False).
+            Defaults to True.
+            killer_slots (int, optional): The number of killer moves kept for each ply. Defaults to 2.
+        """
+        self.enabled = enabled
+        self.killer_slots = killer_slots
+        self.killers = {}
+        self.history = {}
+        self.nodes = 0
+        self.total_nodes = 0
+
+    def new_search(self):
+        """Prepare the heuristics for a new search, forgetting the killer moves (their plies no longer match)
+        and halving the history scores, so recent cutoffs weigh more.
+        """
+        self.killers = {}
+        self.history = {move: score // 2 for move, score in self.history.items() if score > 1}
+        self.nodes = 0
+
+    def count_node(self):
+        """Count a node visited by the search.
+        """
+        self.nodes += 1
+        self.total_nodes += 1
+
+    def add_nodes(self, count: int):
+        """Count nodes visited for the search elsewhere, e.g. by the worker processes of a parallel search.
+
+        Args:
+            count (int): The number of nodes.
+        """
+        self.nodes += count
+        self.total_nodes += count
+
+    def order(self, state, moves: list, ply: int, pv_move: tuple = None) -> list:
+        """Sort moves so the ones most likely to cause a cutoff are searched first: the principal variation
+        move, then moves that trap an opponent's piece, then the killer moves of the ply and finally
+        the rest, by history score. Moves in the same group keep their original order.
+
+        Args:
+            state (State): The state the moves are played from.
+            moves (list): The moves, in the format (chosen_piece_idx, target_fork_idx).
+            ply (int): The distance from the search's root.
+            pv_move (tuple, optional): The best move found by a previous search. Defaults to None.
+
+        Returns:
+            list: The sorted moves (or the given ones, if the ordering is disabled).
+        """
+        if not self.enabled:
+            return moves
+        killers = self.killers.get(ply, [])
+        history = self.history
+
+        def priority(move):
+            if move == pv_move:
+                return (0, 0)
+            if state.is_trapping_move(move[0], move[1]):
+                return (1, 0)
+            if move in killers:
+                return (2, killers.index(move))
+            return (3, -history.get(move, 0))
+
+        return sorted(moves, key=priority)
+
+    def order_root(self, state, moves: list, pv_move: tuple = None) -> list:
+        """Sort the moves of a search's root: the principal variation move, then moves that trap an
+        opponent's piece, then the rest. Learned heuristics are left out, so the root order
+        (and the choice between equal moves) does not depend on how earlier searches went.
+
+        Args:
+            state (State): The state the moves are played from.
+            moves (list): The moves, in the format (chosen_piece_idx, target_fork_idx).
+            pv_move (tuple, optional): The best move found by a previous search. Defaults to None.
+
+        Returns:
+            list: The sorted moves (or the given ones, if the ordering is disabled).
+        """
+        if not self.enabled:
+            return moves
+        return sorted(
+            moves, key=lambda move: 0 if move == pv_move else
+            1 if state.is_trapping_move(move[0], move[1]) else 2)
+
+    def record_cutoff(self, move: tuple, ply: int, depth: int):
+        """Record a move that caused a cutoff, as a killer move of its ply and in the history table.
+
+        Args:
+            move (tuple): The move, in the format (chosen_piece_idx, target_fork_idx).
+            ply (int): The distance from the search's root.
+            depth (int): The remaining depth at which the move was searched.
+        """
+        if not self.enabled:
+            return
+        killers = self.killers.setdefault(ply, [])
+        if move in killers:
+            killers.remove(move)
+        killers.insert(0, move)
+        del killers[self.killer_slots:]
+        self.history[move] = self.history.get(move, 0) + depth * depth
+
+    def __repr__(self):
+        return f"MoveOrderer({'on' if self.enabled else 'off'}, {self.nodes} nodes)"
@@ -0,0 +1,281 @@
+import math
+from functools import lru_cache
+from bitboard import iter_bits
+from constants import Piece
+from engine import Board, Player, State
+
+# Positions are ranked in the combinatorial number system: a set of forks f_1 < f_2 < ... < f_k
+# is ranked C(f_1, 1) + C(f_2, 2) + ... + C(f_k, k), which numbers the sets of k forks from 0 without gaps.
+# Red's forks are ranked among all forks and Black's among the forks Red leaves free, then the player to move
+# is appended as the lowest digit, so the positions with given piece counts get the ranks 0 to position_count - 1.
+
+
+@lru_cache(maxsize=None)
+def get_binomials(size: int) -> tuple:
+    """Get the table of binomial coefficients C(n, k) for n and k up to a given size.
+
+    Args:
+        size (int): The largest n and k.
+
+    Returns:
+        tuple: The coefficients, indexed by n then k.
+    """
+    return tuple(tuple(math.comb(n, k) for k in range(size + 1))
+                 for n in range(size + 1))
+
+
+def get_piece_counts(
+        outer_length: int, red_pieces: int = None,
+        black_pieces: int = None) -> tuple:
+    """Get the piece counts of a board's positions, defaulting to the ones placed at the start of a game.
+
+    Args:
+        outer_length (int): The length of the outer layer.
+        red_pieces (int, optional): The number of Red pieces. Defaults to None (outer_length - 1).
+        black_pieces (int, optional): The number of Black pieces. Defaults to None (outer_length - 1).
+
+    Returns:
+        tuple: The number of Red and Black pieces.
+    """
+    if red_pieces is None:
+        red_pieces = outer_length - 1
+    if black_pieces is None:
+        black_pieces = outer_length - 1
+    return red_pieces, black_pieces
+
+
+def position_count(
+        outer_length: int, red_pieces: int = None,
+        black_pieces: int = None) -> int:
+    """Get the number of positions of a board with given piece counts, with either player to move.
+
+    Args:
+        outer_length (int): The length of the outer layer.
+        red_pieces (int, optional): The number of Red pieces. Defaults to None (outer_length - 1,
+        as placed at the start of a game, since pieces are never removed).
+        black_pieces (int, optional): The number of Black pieces. Defaults to None (outer_length - 1).
+
+    Returns:
+        int: The number of positions.
+    """
+    size = outer_length * 4
+    red_pieces, black_pieces = get_piece_counts(
+        outer_length, red_pieces, black_pieces)
+    return (math.comb(size, red_pieces)
+            * math.comb(size - red_pieces, black_pieces) * 2)
+
+
+def rank_position(outer_length: int, red: int, black: int, side: int) -> int:
+    """Get the rank of a position among the positions of its board with the same piece counts.
+
+    Args:
+        outer_length (int): The length of the outer layer.
+        red (int): The mask of Red's pieces.
+        black (int): The mask of Black's pieces.
+        side (int): The value of the piece of the player to move.
+
+    Returns:
+        int: The position's rank.
+    """
+    size = outer_length * 4
+    binomials = get_binomials(size)
+    red_rank = black_rank = 0
+    red_seen = black_seen = 0
+    for fork in iter_bits(red | black):
+        if red >> fork & 1:
+            red_seen += 1
+            red_rank += binomials[fork][red_seen]
+        else:
+            # Black's forks are numbered among the ones Red left free
+            black_seen += 1
+            black_rank += binomials[fork - red_seen][black_seen]
+    black_count = binomials[size - red_seen][black_seen]
+    return (red_rank * black_count + black_rank) * 2 + side - 1
+
+
+def unrank_combination(rank: int, count: int, binomials: tuple) -> list:
+    """Get the set of indices with a given rank in the combinatorial number system.
+
+    Args:
+        rank (int): The set's rank.
+        count (int): The number of indices in the set.
+        binomials (tuple): A table of binomial coefficients large enough for the indices.
+
+    Returns:
+        list: The indices, from highest to lowest.
+    """
+    indices = []
+    index = len(binomials) - 1
+    for i in range(count, 0, -1):
+        while binomials[index][i] > rank:
+            index -= 1
+        rank -= binomials[index][i]
+        indices.append(index)
+        index -= 1
+    return indices
+
+
+def unrank_position(
+        outer_length: int, rank: int, red_pieces: int = None,
+        black_pieces: int = None) -> tuple:
+    """Get the position with a given rank, as given by rank_position.
+
+    Args:
+        outer_length (int): The length of the outer layer.
+        rank (int): The position's rank.
+        red_pieces (int, optional): The number of Red pieces. Defaults to None (outer_length - 1).
+        black_pieces (int, optional): The number of Black pieces. Defaults to None (outer_length - 1).
+
+    Returns:
+        tuple: The mask of Red's pieces, the mask of Black's pieces and the value of the piece of the player to move.
+    """
+    size = outer_length * 4
+    binomials = get_binomials(size)
+    red_pieces, black_pieces = get_piece_counts(
+        outer_length, red_pieces, black_pieces)
+    side = (rank & 1) + 1
+    red_rank, black_rank = divmod(
+        rank >> 1, binomials[size - red_pieces][black_pieces])
+    red = 0
+    for fork in unrank_combination(red_rank, red_pieces, binomials):
+        red |= 1 << fork
+    free_forks = [fork for fork in range(size) if not red >> fork & 1]
+    black = 0
+    for index in unrank_combination(black_rank, black_pieces, binomials):
+        black |= 1 << free_forks[index]
+    return red, black, side
+
+
+def rank_state(state) -> int:
+    """Get the rank of a state's position, as given by rank_position.
+
+    Args:
+        state (State): The state.
+
+    Returns:
+        int: The position's rank.
+    """
+    board = state.board
+    return rank_position(
+        board.outer_length, board.bitboards[1], board.bitboards[2],
+        state.player_piece.value)
+
+
+def unrank_state(
+        outer_length: int, rank: int, red_pieces: int = None,
+        black_pieces: int = None):
+    """Build the state of the position with a given rank, as given by rank_position.
+
+    Args:
+        outer_length (int): The length of the outer layer.
+        rank (int): The position's rank.
+        red_pieces (int, optional): The number of Red pieces. Defaults to None (outer_length - 1).
+        black_pieces (int, optional): The number of Black pieces. Defaults to None (outer_length - 1).
+
+    Returns:
+        State: The state, with no winner set.
+    """
+    red, black, side = unrank_position(
+        outer_length, rank, red_pieces, black_pieces)
+    board = Board(outer_length)
+    for fork in iter_bits(red):
+        board.set_status(fork, Piece.Red)
+    for fork in iter_bits(black):
+        board.set_status(fork, Piece.Black)
+    return State(Player(side, Piece(side)), board)
+
+
+class BulkRanker:
+    """Class ranking and unranking arrays of positions of a board at once with NumPy,
+    working through the forks (or the piece indices) with one array operation each.
+    """
+
+    def __init__(
+            self, outer_length: int, red_pieces: int = None,
+            black_pieces: int = None):
+        """Initialize a ranker for a board's positions with given piece counts.
+
+        Args:
+            outer_length (int): The length of the outer layer.
+            red_pieces (int, optional): The number of Red pieces. Defaults to None (outer_length - 1).
+            black_pieces (int, optional): The number of Black pieces. Defaults to None (outer_length - 1).
+        """
+        import numpy
+        self.numpy = numpy
+        self.outer_length = outer_length
+        size = self.size = outer_length * 4
+        self.red_pieces, self.black_pieces = get_piece_counts(
+            outer_length, red_pieces, black_pieces)
+        self.black_count = math.comb(size - self.red_pieces, self.black_pieces)
+        self.binomials = numpy.array(get_binomials(size), dtype=numpy.int64)
+
+    def rank(self, red, black, side):
+        """Get the ranks of arrays of positions, as given by rank_position.
+
+        Args:
+            red (numpy.ndarray): Red's masks.
+            black (numpy.ndarray): Black's masks.
+            side (numpy.ndarray): The values of the pieces to move.
+
+        Returns:
+            numpy.ndarray: The ranks.
+        """
+        numpy = self.numpy
+        red_rank = numpy.zeros(len(red), dtype=numpy.int64)
+        black_rank = numpy.zeros(len(red), dtype=numpy.int64)
+        red_seen = numpy.zeros(len(red), dtype=numpy.int64)
+        black_seen = numpy.zeros(len(red), dtype=numpy.int64)
+        for fork in range(self.size):
+            is_red = (red >> fork) & 1
+            is_black = (black >> fork) & 1
+            red_seen += is_red
+            red_rank += is_red * self.binomials[fork, red_seen]
+            black_seen += is_black
+            black_rank += is_black * self.binomials[fork - red_seen, black_seen]
+        return (red_rank * self.black_count + black_rank) * 2 + side - 1
+
+    def unrank_combinations(self, ranks, count: int):
+        """Get the sets of indices of an array of ranks in the combinatorial number system,
+        as given by unrank_combination.
+
+        Args:
+            ranks (numpy.ndarray): The sets' ranks.
+            count (int): The number of indices in each set.
+
+        Returns:
+            numpy.ndarray: The masks of the sets' indices.
+        """
+        numpy = self.numpy
+        ranks = ranks.copy()
+        masks = numpy.zeros(len(ranks), dtype=numpy.int64)
+        for i in range(count, 0, -1):
+            # The highest index whose coefficient fits in the rank left, found by binary search
+            # since C(index, i) grows with index
+            column = numpy.ascontiguousarray(self.binomials[:, i])
+            indices = numpy.searchsorted(column, ranks, side='right') - 1
+            ranks -= column[indices]
+            masks |= numpy.left_shift(1, indices)
+        return masks
+
+    def unrank(self, ranks) -> tuple:
+        """Get the positions of an array of ranks, as given by unrank_position.
+
+        Args:
+            ranks (numpy.ndarray): The ranks.
+
+        Returns:
+            tuple: The arrays of Red's masks, Black's masks and values of the pieces to move.
+        """
+        numpy = self.numpy
+        side = (ranks & 1) + 1
+        red_rank, black_rank = numpy.divmod(ranks >> 1, self.black_count)
+        red = self.unrank_combinations(red_rank, self.red_pieces)
+        # Black's indices are among the forks Red left free, so they are spread over those forks
+        indices = self.unrank_combinations(black_rank, self.black_pieces)
+        black = numpy.zeros(len(ranks), dtype=numpy.int64)
+        free_seen = numpy.zeros(len(ranks), dtype=numpy.int64)
+        for fork in range(self.size):
+            is_free = 1 - ((red >> fork) & 1)
+            black |= ((indices >> free_seen) & is_free) << fork
+            free_seen += is_free
+        return red, black, side
@@ -0,0 +1,131 @@
+import csv
+import json
+import os
+try:
+    import fcntl
+except ImportError:
+    # Without file locks (on Windows), records still go out in a single append each
+    fcntl = None
+
+# Default path of the results log, which gets one JSON record per line
+RESULTS_PATH = "results.jsonl"
+# Bot difficulty values (see Bound.choose_bot) labelling the rows and columns of the win matrices
+BOT_LABELS = {1: "RANDOM", 2: "MCTS", 3: "MINIMAX1", 4: "MINIMAX3"}
+
+
+def append_result(record: dict, path: str = RESULTS_PATH):
+    """Append a game's record to a results log. The record is written as a single line in a single append,
+    under an exclusive lock where available, so several processes can write to the same log at once.
+
+    Args:
+        record (dict): The game's record, as given by Bound.get_record.
+        path (str, optional): The path of the log. Defaults to RESULTS_PATH.
+    """
+    line = (json.dumps(record, separators=(",", ":")) + "\n").encode()
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        written = 0
+        while written < len(line):
+            written += os.write(fd, line[written:])
+    finally:
+        # Closing the file also releases the lock
+        os.close(fd)
+
+
+def read_results(path: str = RESULTS_PATH, **filters) -> list:
+    """Read the records of a results log, optionally keeping only the ones with given values.
+    A last line left incomplete by an interrupted writer is skipped.
+
+    Args:
+        path (str, optional): The path of the log. Defaults to RESULTS_PATH.
+        **filters: Record fields and the values they must have, e.g. outer_length=5.
+
+    Returns:
+        list: The records, in the order they were written.
+    """
+    records = []
+    if not os.path.exists(path):
+        return records
+    with open(path) as file:
+        for line in file:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if all(record.get(key) == value for key, value in filters.items()):
+                records.append(record)
+    return records
+
+
+def win_matrix(records: list, first: str) -> dict:
+    """Count the wins of each pair of bots in the games started by a given piece type.
+
+    Args:
+        records (list): The game records, as given by read_results.
+        first (str): The name of the piece type that started the games ("Red" or "Black").
+
+    Returns:
+        dict: A dictionary with tuples (bot_1, bot_2) of difficulty values as keys, bot_1 being the starting bot,
+        and lists [bot_1 wins, bot_2 wins] as values.
+    """
+    matrix = {}
+    for record in records:
+        if record["first"] != first:
+            continue
+        wins = matrix.setdefault((record["bot_1"], record["bot_2"]), [0, 0])
+        wins[0 if record["winner"] == first else 1] += 1
+    return matrix
+
+
+def read_win_matrix(path: str) -> dict:
+    """Read a win matrix back from a CSV file written by write_win_matrix.
+
+    Args:
+        path (str): The path of the CSV file.
+
+    Returns:
+        dict: The win matrix, in the format given by win_matrix, or an empty one if the file does not exist.
+    """
+    matrix = {}
+    if not os.path.exists(path):
+        return matrix
+    bots = {label: bot for bot, label in BOT_LABELS.items()}
+    with open(path, newline='') as file:
+        rows = list(csv.reader(file))
+    if not rows:
+        return matrix
+    columns = [bots.get(label) for label in rows[0][1:]]
+    for row in rows[1:]:
+        if not row or row[0] not in bots:
+            continue
+        for bot_2, cell in zip(columns, row[1:]):
+            if bot_2 is not None:
+                matrix[(bots[row[0]], bot_2)] = [int(wins) for wins in cell.split("-")]
+    return matrix
+
+
+def write_win_matrix(path: str, matrix: dict, first: str):
+    """Write a win matrix to a CSV file, with a row for each starting bot and a column for each other bot,
+    each cell holding the starting bot's wins and the other bot's wins.
+    Cells of pairs of bots missing from the matrix keep the counts already in the file, if any.
+
+    Args:
+        path (str): The path of the CSV file.
+        matrix (dict): The win matrix, as given by win_matrix.
+        first (str): The name of the piece type that started the games ("Red" or "Black").
+    """
+    cells = read_win_matrix(path)
+    cells.update(matrix)
+    corner = "R-B" if first == "Red" else "B-R"
+    with open(path, mode='w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow([corner, *BOT_LABELS.values()])
+        for bot_1, label in BOT_LABELS.items():
+            writer.writerow([label, *(
+                "-".join(map(str, cells.get((bot_1, bot_2), [0, 0])))
+                for bot_2 in BOT_LABELS)])
+        writer.writerow([])
+        writer.writerow(["Eval func: 4 vs 4"])
+        writer.writerow([f"Start: {first}"])
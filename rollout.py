@@ -0,0 +1,110 @@
+import random
+import time
+from bitboard import get_topology, iter_bits, trapped_mask
+from constants import Piece
+
+
+class Rollout:
+    """Class playing random games from a position until a piece is trapped, as simulated by MCTS.
+    A playout works on a single mutable position (two bitboards, a hash and the player to move),
+    without tree nodes or copies of the board, and only borrows the position's history,
+    which is left as it was found.
+    """
+
+    def __init__(self, outer_length: int = 5):
+        """Initialize a rollout engine for boards with the given outer layer length.
+
+        Args:
+            outer_length (int, optional): The length of the outer layer. Defaults to 5.
+        """
+        self.topology = get_topology(outer_length)
+        self.playouts = 0
+        self.elapsed = 0.0
+
+    def play(self, state, state_history) -> Piece:
+        """Play random moves from a state until the game ends.
+
+        Args:
+            state (State): The starting state, which is not modified.
+            state_history (History): The state's history, ending with the state's position.
+            Playout positions are added to it while the game is played, then removed.
+
+        Returns:
+            Piece: The winning piece type.
+        """
+        start = time.perf_counter()
+        topology = self.topology
+        neighbour_masks = topology.neighbour_masks
+        piece_keys = topology.piece_keys
+        turn_keys = topology.turn_keys
+        full_mask = topology.full_mask
+
+        bitboards = state.board.bitboards[:]
+        zobrist = state.board.zobrist
+        side = state.player_piece.value
+        occupied = bitboards[1] | bitboards[2]
+        trapped = trapped_mask(topology, occupied, full_mask & ~occupied)
+        winner = None
+        played = 0
+
+        while not trapped:
+            empty = full_mask & ~occupied
+            moves = []
+            for i in iter_bits(bitboards[side]):
+                for j in iter_bits(neighbour_masks[i] & empty):
+                    moves.append((i, j))
+
+            # At most one move restarts a closed loop: the one leading to the position that followed
+            # the previous occurrence of this one (see History.forbidden_next)
+            forbidden = state_history.forbidden_next(zobrist ^ turn_keys[side])
+
+            keys = piece_keys[side]
+            while moves:
+                k = random.randrange(len(moves))
+                i, j = moves[k]
+                next_zobrist = zobrist ^ keys[i] ^ keys[j]
+                if next_zobrist ^ turn_keys[3 - side] != forbidden:
+                    break
+                moves[k] = moves[-1]
+                moves.pop()
+            else:
+                # A player left without valid moves loses
+                winner = Piece(3 - side)
+                break
+
+            bitboards[side] ^= (1 << i) | (1 << j)
+            occupied ^= (1 << i) | (1 << j)
+            zobrist = next_zobrist
+            side = 3 - side
+            state_history.append(zobrist ^ turn_keys[side])
+            played += 1
+            # Only the moved piece and the pieces next to its target fork can have been trapped
+            trapped = trapped_mask(
+                topology, occupied & (neighbour_masks[j] | 1 << j),
+                full_mask & ~occupied)
+
+        for _ in range(played):
+            state_history.pop()
+
+        if winner is None:
+            # The lowest trapped fork decides the winner, as in State.simulate_winner
+            winner = Piece.Black if trapped & -trapped & bitboards[1] else Piece.Red
+        self.playouts += 1
+        self.elapsed += time.perf_counter() - start
+        return winner
+
+    def reset_counters(self):
+        """Forget the playouts played so far, e.g. to measure the speed of a single search.
+        """
+        self.playouts = 0
+        self.elapsed = 0.0
+
+    def playouts_per_second(self) -> float:
+        """Get the average speed of the playouts played so far.
+
+        Returns:
+            float: The number of playouts per second, or 0 if none was played.
+        """
+        if self.elapsed == 0:
+            return 0.0
+        return self.playouts / self.elapsed
@@ -0,0 +1,175 @@
+from functools import lru_cache
+from bitboard import get_topology
+from ranking import rank_position
+
+
+class Symmetries:
+    """Class storing the symmetries of a board with a given outer layer length: the permutations of its forks
+    that keep every fork in its layer and every path between forks (the rotations and mirror images of the board),
+    along with lookup tables applying them to masks of forks.
+    Symmetric positions have the same moves and evaluations, but not always the same winner:
+    when a move traps pieces of both players, the lowest trapped fork decides (see State.simulate_winner).
+    """
+
+    def __init__(self, outer_length: int):
+        """Find the board's symmetries and build their tables.
+
+        Args:
+            outer_length (int): The length of the outer layer.
+        """
+        topology = get_topology(outer_length)
+        self.outer_length = outer_length
+        self.size = topology.size
+        layers = [0] * outer_length + [1] * (outer_length * 2) + [2] * outer_length
+        # Each permutation maps a fork index to its image, the first one is the identity
+        self.permutations = tuple(find_automorphisms(topology.neighbours, layers))
+        self.inverses = tuple(
+            tuple(permutation.index(fork) for fork in range(self.size))
+            for permutation in self.permutations)
+        # For each permutation, the image of every value of each byte of a mask
+        self.tables = tuple(
+            tuple(tuple(
+                sum(1 << permutation[byte * 8 + bit]
+                    for bit in range(8)
+                    if value >> bit & 1 and byte * 8 + bit < self.size)
+                for value in range(256))
+                for byte in range((self.size + 7) // 8))
+            for permutation in self.permutations)
+
+    def transform(self, mask: int, symmetry: int) -> int:
+        """Apply a symmetry to a mask of forks.
+
+        Args:
+            mask (int): The mask.
+            symmetry (int): The index of the symmetry.
+
+        Returns:
+            int: The mask of the images of the forks.
+        """
+        image = 0
+        for table in self.tables[symmetry]:
+            image |= table[mask & 255]
+            mask >>= 8
+        return image
+
+    def canonicalize(self, red: int, black: int) -> tuple:
+        """Find the canonical representative of a position among its symmetric images:
+        the one with the lowest (Red's mask, Black's mask).
+
+        Args:
+            red (int): The mask of Red's pieces.
+            black (int): The mask of Black's pieces.
+
+        Returns:
+            tuple: The canonical masks of Red's and Black's pieces and the index of the symmetry giving them.
+        """
+        best = (red, black, 0)
+        for symmetry in range(1, len(self.tables)):
+            image = (self.transform(red, symmetry),
+                     self.transform(black, symmetry), symmetry)
+            if image < best:
+                best = image
+        return best
+
+    def map_move(self, move: tuple, symmetry: int) -> tuple:
+        """Get the image of a move under a symmetry, e.g. to turn a move of a position
+        into the same move of its canonical representative.
+
+        Args:
+            move (tuple): The move, in the format (chosen_piece_idx, target_fork_idx).
+            symmetry (int): The index of the symmetry.
+
+        Returns:
+            tuple: The move's image.
+        """
+        permutation = self.permutations[symmetry]
+        return permutation[move[0]], permutation[move[1]]
+
+    def unmap_move(self, move: tuple, symmetry: int) -> tuple:
+        """Undo map_move, e.g. to turn a move of a canonical representative into the same move
+        of the original position.
+
+        Args:
+            move (tuple): The move's image, in the format (chosen_piece_idx, target_fork_idx).
+            symmetry (int): The index of the symmetry.
+
+        Returns:
+            tuple: The original move.
+        """
+        inverse = self.inverses[symmetry]
+        return inverse[move[0]], inverse[move[1]]
+
+    def __len__(self):
+        return len(self.permutations)
+
+    def __repr__(self):
+        return f"Symmetries({self.outer_length})"
+
+
+def find_automorphisms(neighbours: tuple, layers: list) -> list:
+    """Find every permutation of a graph's vertices that keeps each vertex in its layer
+    and maps edges to edges, by backtracking over the vertices' images.
+
+    Args:
+        neighbours (tuple): The neighbour indices of each vertex.
+        layers (list): The layer of each vertex.
+
+    Returns:
+        list: The permutations, as tuples of the images of the vertices, starting with the identity.
+    """
+    size = len(neighbours)
+    neighbour_sets = [set(vertex_neighbours) for vertex_neighbours in neighbours]
+    permutations = []
+    image = [None] * size
+    used = [False] * size
+
+    def assign(vertex: int):
+        if vertex == size:
+            permutations.append(tuple(image))
+            return
+        for candidate in range(size):
+            if used[candidate] or layers[candidate] != layers[vertex] \
+                    or len(neighbour_sets[candidate]) != len(neighbour_sets[vertex]):
+                continue
+            # Paths to the vertices already placed must be kept, and no other path created
+            if all((image[other] in neighbour_sets[candidate]) == (other in neighbour_sets[vertex])
+                   for other in range(vertex)):
+                image[vertex] = candidate
+                used[candidate] = True
+                assign(vertex + 1)
+                used[candidate] = False
+        image[vertex] = None
+
+    assign(0)
+    permutations.sort(key=lambda permutation: permutation != tuple(range(size)))
+    return permutations
+
+
+@lru_cache(maxsize=None)
+def get_symmetries(outer_length: int) -> Symmetries:
+    """Get the shared symmetries of a board with the given outer layer length, finding them on first use.
+
+    Args:
+        outer_length (int): The length of the outer layer.
+
+    Returns:
+        Symmetries: The board's symmetries.
+    """
+    return Symmetries(outer_length)
+
+
+def canonical_rank(state) -> tuple:
+    """Get the rank (see ranking.py) of the canonical representative of a state's position,
+    which is shared by all of its symmetric images.
+
+    Args:
+        state (State): The state.
+
+    Returns:
+        tuple: The canonical rank and the index of the symmetry mapping the state's position to it.
+    """
+    board = state.board
+    red, black, symmetry = get_symmetries(board.outer_length).canonicalize(
+        board.bitboards[1], board.bitboards[2])
+    return rank_position(
+        board.outer_length, red, black, state.player_piece.value), symmetry
@@ -0,0 +1,215 @@
+import mmap
+import random
+import struct
+import sys
+import time
+from bitboard import get_topology
+from constants import Outcome
+from ranking import BulkRanker, position_count, rank_state
+
+# File header: magic, outer layer length and pieces per player, followed by one entry per position rank
+HEADER = struct.Struct("<4sBBH")
+MAGIC = b"BTB1"
+# Entries hold the outcome in their two lowest bits and the distance to the end of the game in the others
+ENTRY = struct.Struct("<H")
+MAX_DISTANCE = (1 << 14) - 1
+
+
+class Tablebase:
+    """Class giving the solved outcome of every position of a board, read from a tablebase file
+    through a memory map, so only the pages of the probed positions are loaded.
+    Positions are solved without the rule forbidding to restart closed movement loops,
+    which depends on the game's history.
+    """
+
+    def __init__(self, path: str):
+        """Open a tablebase file written by generate_tablebase.
+
+        Args:
+            path (str): The path of the file.
+
+        Raises:
+            ValueError: The file is not a tablebase.
+        """
+        with open(path, "rb") as file:
+            self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.outer_length, self.pieces, _ = HEADER.unpack_from(self.map)
+        size = HEADER.size + ENTRY.size * position_count(self.outer_length)
+        if magic != MAGIC or len(self.map) != size:
+            self.map.close()
+            raise ValueError(f"{path} is not a tablebase file")
+
+    def probe(self, state) -> tuple | None:
+        """Get the outcome of a state's position for the player to move.
+
+        Args:
+            state (State): The state.
+
+        Returns:
+            tuple | None: The Outcome and the number of moves until the game ends with best play
+            (0 for draws), or None if the state's board is not covered by the tablebase.
+        """
+        board = state.board
+        red, black = board.bitboards[1], board.bitboards[2]
+        if (board.outer_length != self.outer_length
+                or red.bit_count() != self.pieces or black.bit_count() != self.pieces):
+            return None
+        rank = rank_state(state)
+        entry, = ENTRY.unpack_from(self.map, HEADER.size + ENTRY.size * rank)
+        return Outcome(entry & 3), entry >> 2
+
+    def best_move(self, state, state_history) -> tuple | None:
+        """Find the best available move of a state's player in a won or lost position:
+        one of the fastest wins, or one of the slowest losses (ties are broken randomly).
+        Drawn positions are left to the caller: whether they stay drawn depends on the loop rule,
+        which a search of the game's history handles better than moving between drawn positions.
+
+        Args:
+            state (State): The state, which is restored after trying the moves.
+            state_history (History): The game's state history.
+
+        Returns:
+            tuple | None: The move, in the format (chosen_piece_idx, target_fork_idx),
+            or None if the state's board is not covered by the tablebase, the position is drawn
+            or there are no moves.
+        """
+        result = self.probe(state)
+        if result is None or result[0] == Outcome.Draw:
+            return None
+        best_moves = []
+        best_key = None
+        for move in state.available_moves(state.player_piece, state_history):
+            undo = state.make_move(move[0], move[1], state_history)
+            outcome, distance = self.probe(state)
+            state.unmake_move(undo, state_history)
+            # The outcome is seen by the opponent, who moves next
+            match outcome:
+                case Outcome.Loss:
+                    key = (2, -distance)
+                case Outcome.Draw:
+                    key = (1, 0)
+                case Outcome.Win:
+                    key = (0, distance)
+            if best_key is None or key > best_key:
+                best_moves, best_key = [move], key
+            elif key == best_key:
+                best_moves.append(move)
+        if not best_moves:
+            return None
+        return random.choice(best_moves)
+
+    def close(self):
+        """Close the tablebase file.
+        """
+        self.map.close()
+
+
+def generate_tablebase(outer_length: int, path: str, chunk_size: int = 1 << 20):
+    """Solve every position of a board by retrograde analysis and write the results to a tablebase file.
+    Final positions (see State.simulate_winner) are solved first, then each pass solves the positions
+    one move further from the end: a position is won if a move leads to a position lost for the opponent,
+    and lost once every move leads to a position won by the opponent. Positions left unsolved are draws.
+    Requires NumPy.
+
+    Args:
+        outer_length (int): The length of the outer layer.
+        path (str): The path of the file to write.
+        chunk_size (int, optional): The number of positions handled at once. Defaults to 1048576.
+
+    Raises:
+        ValueError: A distance to the end does not fit in the file's entries.
+    """
+    import numpy
+    topology = get_topology(outer_length)
+    ranker = BulkRanker(outer_length)
+    count = position_count(outer_length)
+    neighbour_masks = numpy.array(topology.neighbour_masks, dtype=numpy.int64)
+    # Every move as a pair (from_fork, to_fork)
+    edges = [(i, j) for i in range(topology.size) for j in topology.neighbours[i]]
+
+    outcomes = numpy.zeros(count, dtype=numpy.uint8)
+    distances = numpy.zeros(count, dtype=numpy.uint16)
+    # Moves of each unsolved position not yet known to lead to a position won by the opponent
+    remaining = numpy.zeros(count, dtype=numpy.uint8)
+
+    for start in range(0, count, chunk_size):
+        ranks = numpy.arange(start, min(start + chunk_size, count), dtype=numpy.int64)
+        red, black, side = ranker.unrank(ranks)
+        occupied = red | black
+        empty = topology.full_mask & ~occupied
+        trapped = numpy.zeros(len(ranks), dtype=numpy.int64)
+        for fork in range(topology.size):
+            trapped |= numpy.where(
+                ((occupied >> fork) & 1).astype(bool)
+                & ((empty & neighbour_masks[fork]) == 0), 1 << fork, 0)
+        final = trapped != 0
+        # The lowest trapped fork decides the winner, as in State.simulate_winner
+        winner = numpy.where((trapped & -trapped & red) != 0, 2, 1)
+        outcomes[ranks[final]] = numpy.where(
+            winner[final] == side[final], Outcome.Win.value, Outcome.Loss.value)
+        own = numpy.where(side == 1, red, black)
+        moves = numpy.zeros(len(ranks), dtype=numpy.uint8)
+        for i, j in edges:
+            moves += ((own >> i) & (empty >> j) & 1).astype(numpy.uint8)
+        remaining[ranks[~final]] = moves[~final]
+
+    frontier = numpy.flatnonzero(outcomes)
+    distance = 0
+    while len(frontier):
+        distance += 1
+        if distance > MAX_DISTANCE:
+            raise ValueError("Distance to the end too large for the tablebase")
+        solved = []
+        for start in range(0, len(frontier), chunk_size):
+            ranks = frontier[start:start + chunk_size]
+            red, black, side = ranker.unrank(ranks)
+            lost = outcomes[ranks] == Outcome.Loss.value
+            empty = topology.full_mask & ~(red | black)
+            # The previous player moved one of their pieces from fork i to fork j
+            previous = numpy.where(side == 1, black, red)
+            predecessors = []
+            predecessor_lost = []
+            for i, j in edges:
+                moved = ((previous >> j) & (empty >> i) & 1).astype(bool)
+                back = previous[moved] ^ (1 << i) ^ (1 << j)
+                previous_side = 3 - side[moved]
+                predecessors.append(ranker.rank(
+                    numpy.where(previous_side == 1, back, red[moved]),
+                    numpy.where(previous_side == 2, back, black[moved]),
+                    previous_side))
+                predecessor_lost.append(lost[moved])
+            predecessors = numpy.concatenate(predecessors)
+            predecessor_lost = numpy.concatenate(predecessor_lost)
+
+            # A move to a position lost for the opponent wins
+            won = numpy.unique(predecessors[predecessor_lost])
+            won = won[outcomes[won] == 0]
+            outcomes[won] = Outcome.Win.value
+            distances[won] = distance
+            # A position is lost once none of its moves is left
+            losing, moves = numpy.unique(
+                predecessors[~predecessor_lost], return_counts=True)
+            unsolved = outcomes[losing] == 0
+            losing, moves = losing[unsolved], moves[unsolved]
+            remaining[losing] -= moves.astype(numpy.uint8)
+            losing = losing[remaining[losing] == 0]
+            outcomes[losing] = Outcome.Loss.value
+            distances[losing] = distance
+            solved += [won, losing]
+        frontier = numpy.concatenate(solved)
+
+    entries = (outcomes.astype(numpy.uint16)
+               | (distances << numpy.uint16(2))).astype("<u2")
+    with open(path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, outer_length, outer_length - 1, 0))
+        entries.tofile(file)
+
+
+if __name__ == "__main__":
+    # Usage: python tablebase.py OUTER_LENGTH [PATH]
+    length = int(sys.argv[1])
+    output = sys.argv[2] if len(sys.argv) > 2 else f"tablebase_{length}.bin"
+    start_time = time.perf_counter()
+    generate_tablebase(length, output)
+    print(f"Solved {position_count(length)} positions into {output} "
+          f"in {time.perf_counter() - start_time:.1f}s")
@@ -1,5 +1,5 @@
-import csv
 from Game import run_games
+from results import RESULTS_PATH, read_results, win_matrix, write_win_matrix
 
 start_piece = {False: "Red", True: "Black"}
 bot_depth = {3: "1", 4: "3"}
@@ -7,7 +7,7 @@ bot_depth = {3: "1", 4: "3"}
 
 def save_results(n_games: int, rev_start_order: bool, bot_1: int, bot_2: int):
     """Run a certain amount of games, given the starting order and the two bot 
-    difficulty values, and store the results in a CSV file.
+    difficulty values, and append each game's record to the results log.
 
     Args:
         n_games (int): The number of games to be played.
@@ -15,20 +15,18 @@ def save_results(n_games: int, rev_start_order: bool, bot_1: int, bot_2: int):
         bot_1 (int): The first bot's difficulty.
         bot_2 (int): The second bot's difficulty.
     """
-    results = run_games(n_games, rev_start_order, bot_1, bot_2)
-    filename = "black" if rev_start_order else "red"
-    with open(f'results_{filename}.csv', mode='r') as file:
-        reader = csv.reader(file)
-        data = list(reader)
-        if rev_start_order:
-            data[bot_1][bot_2] = f"{results['Black']}-{results['Red']}"
-        else:
-            data[bot_1][bot_2] = f"{results['Red']}-{results['Black']}"
+    run_games(n_games, rev_start_order, bot_1, bot_2,
+              results_path=RESULTS_PATH)
 
-    with open(f'results_{filename}.csv', mode='w', newline='') as file:
-        writer = csv.writer(file)
-        for row in data:
-            writer.writerow(row)
+
+def save_matrices():
+    """Build the win matrices of the games in the results log, for each starting piece type,
+    and store them in CSV files. Pairs of bots with no game in the log keep their counts in the files.
+    """
+    records = read_results(RESULTS_PATH)
+    for first in start_piece.values():
+        write_win_matrix(
+            f"results_{first.lower()}.csv", win_matrix(records, first), first)
 
 
 print("--Red first--")
@@ -77,3 +75,4 @@ print("-mcts50 x mcts50-")
 save_results(10, True, 2, 2)
 print("-mm3 x mm3-")
 save_results(10, True, 4, 4)
+save_matrices()
@@ -0,0 +1,128 @@
+from constants import NodeType
+
+
+class TableEntry:
+    """Class representing a search result stored in a transposition table.
+    """
+    __slots__ = ("key", "depth", "score", "node_type", "best_move", "generation")
+
+    def __init__(
+            self, key: int, depth: int, score: int | float, node_type: NodeType,
+            best_move: tuple | None, generation: int):
+        """Initialize a new table entry.
+
+        Args:
+            key (int): The hash of the searched position.
+            depth (int): The depth the position was searched to.
+            score (int | float): The score found by the search.
+            node_type (NodeType): How the score bounds the real value of the position.
+            best_move (tuple | None): The best move found, in the format (chosen_piece_idx, target_fork_idx).
+            generation (int): The search that stored the entry.
+        """
+        self.key = key
+        self.depth = depth
+        self.score = score
+        self.node_type = node_type
+        self.best_move = best_move
+        self.generation = generation
+
+    def __repr__(self):
+        return f"{self.best_move}-{self.node_type.name}-{self.score}@{self.depth}"
+
+
+class TranspositionTable:
+    """Class representing a bounded cache of minimax results, indexed by position hash.
+    Entries are stored in buckets of two slots: a depth-preferred slot, only replaced by deeper
+    searches or by entries of a newer search, and a slot that is always replaced.
+    """
+
+    def __init__(self, max_entries: int = 1 << 16, reuse_scores: bool = True):
+        """Initialize an empty table.
+
+        Args:
+            max_entries (int, optional): The maximum number of entries kept. Defaults to 65536.
+            reuse_scores (bool, optional): If scores of older searches and deeper searches can be used (True),
+            or only scores of the current search at the same depth (False). Defaults to True.
+        """
+        self.bucket_count = max(1, max_entries // 2)
+        self.reuse_scores = reuse_scores
+        self.deep_slots = [None] * self.bucket_count
+        self.recent_slots = [None] * self.bucket_count
+        self.generation = 0
+
+    def new_search(self, generation: int = None):
+        """Mark the start of a new search, which makes the entries of older searches replaceable.
+
+        Args:
+            generation (int, optional): The number of the new search, used to follow the searches of
+            another table. Defaults to None (the number after the current one).
+        """
+        self.generation = self.generation + 1 if generation is None else generation
+
+    def probe(self, key: int) -> TableEntry | None:
+        """Get the entry stored for a position, preferring the deepest one.
+
+        Args:
+            key (int): The hash of the position.
+
+        Returns:
+            TableEntry | None: The stored entry, or None if the position is not in the table.
+        """
+        bucket = key % self.bucket_count
+        entry = self.deep_slots[bucket]
+        if entry is not None and entry.key == key:
+            return entry
+        entry = self.recent_slots[bucket]
+        if entry is not None and entry.key == key:
+            return entry
+        return None
+
+    def is_usable(self, entry: TableEntry, depth: int) -> bool:
+        """Check if the score of an entry can be used by a search of its position to a given depth.
+        Scores of older searches may come from another game history (the move legality and evaluation
+        depend on it), so they are only used when the table reuses scores.
+
+        Args:
+            entry (TableEntry): The entry.
+            depth (int): The depth the position is searched to.
+
+        Returns:
+            bool: True if the entry's score can be used, False otherwise.
+        """
+        if self.reuse_scores:
+            return entry.depth >= depth
+        return entry.depth == depth and entry.generation == self.generation
+
+    def store(
+            self, key: int, depth: int, score: int | float, node_type: NodeType,
+            best_move: tuple | None):
+        """Store a search result, following the table's replacement scheme.
+
+        Args:
+            key (int): The hash of the searched position.
+            depth (int): The depth the position was searched to.
+            score (int | float): The score found by the search.
+            node_type (NodeType): How the score bounds the real value of the position.
+            best_move (tuple | None): The best move found.
+        """
+        bucket = key % self.bucket_count
+        entry = TableEntry(key, depth, score, node_type, best_move, self.generation)
+        deep = self.deep_slots[bucket]
+        if (deep is None or depth >= deep.depth
+                or deep.generation != self.generation):
+            self.deep_slots[bucket] = entry
+        else:
+            self.recent_slots[bucket] = entry
+
+    def clear(self):
+        """Remove every entry from the table.
+        """
+        self.deep_slots = [None] * self.bucket_count
+        self.recent_slots = [None] * self.bucket_count
+
+    def __len__(self):
+        return (sum(entry is not None for entry in self.deep_slots)
+                + sum(entry is not None for entry in self.recent_slots))
+
+    def __repr__(self):
+        return f"TranspositionTable({len(self)}/{self.bucket_count * 2})"